@@ -7,7 +7,7 @@ Two-pass AV1 (VBR) + Opus archival pipeline using FFmpeg’s libsvtav1,
 with real-time progress printing for both passes.
 
 1) Finds all video files in the current directory (by extension).
-2) Pass 1: libsvtav1 analysis-only (no audio) → VBR mode (-rc 2),
+2) Pass 1: libsvtav1 analysis-only (audio copied, fast preset) → VBR mode (-rc 2),
           writing internal stats to "<stem>_<ts>_svp-0.log".
 3) Pass 2: libsvtav1 encode AV1 + Opus (using pass-logs) → "<stem>_<ts>.mp4".
 4) Prints real-time FFmpeg progress for each pass (frame/fps/time/size).
@@ -19,27 +19,54 @@ with real-time progress printing for both passes.
      • Audio codec
 6) Moves original → "./over/"  and compressed → "./output/".
 7) Cleans up FFmpeg’s internal two-pass log files.
+8) Short clips sharing resolution/fps/codecs are concatenated, encoded
+   once and split back per file (disable with --no-group).
+9) Appends one JSON line per file to "./output/results_<ts>.jsonl" and
+   prints the total bytes saved at the end.
 
 Requirements:
  - FFmpeg ≥ 7.x (with libsvtav1 compiled in).
    Verify with:  ffmpeg -encoders | grep libsvtav1
  - ffprobe on your PATH.
- - Python 3.7+.
+ - Python 3.8+.
 
 Usage:
     Place this script in the folder with your videos, then:
-        python batch_two_pass_libsvtav1_with_progress.py
+        python batch_two_pass_libsvtav1_with_progress.py [--jobs N] [--no-group]
+
+    --jobs N encodes N files concurrently (default: cpu_count // 8), each
+    FFmpeg process getting an equal share of the cores via "-threads".
 """
 
+import argparse
+import errno
+import gzip
+import hashlib
 import subprocess
 import shutil
 import time
 import json
 import os
 import sys
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 
+try:
+    from blake3 import blake3 as _content_hash
+except ImportError:                     # stdlib fallback
+    from hashlib import blake2b as _content_hash
+
+try:
+    import fcntl
+except ImportError:                     # Windows: no cross-process cache lock
+    fcntl = None
+
 # ----------------------------------------------------------------------------
 #  CONFIGURATION
 # ----------------------------------------------------------------------------
@@ -52,6 +79,9 @@ FFPROBE_CMD = "ffprobe"
 TARGET_BITRATE = "5000k"       # average video bitrate (2 Mbps)
 # BUFSIZE and -maxrate are removed for VBR
 SVTAV1_PARAMS  = "preset=6:tile-rows=2:tile-columns=2:scd=1:aq-mode=1:tune=0"
+# Pass 1 only gathers stats, so run it at a fast analysis preset (no tiles).
+PASS1_BITRATE        = TARGET_BITRATE
+SVTAV1_PARAMS_PASS1  = "preset=12:scd=1:tune=0"
 
 # 3) Audio settings
 AUDIO_CODEC   = "libopus"
@@ -62,11 +92,49 @@ VIDEO_EXTENSIONS = [
     ".avi", ".mpg", ".mp4", ".flv", ".3gp",
     ".mkv", ".wmv", ".mov", ".mts", ".vob", ".webm"
 ]
+VIDEO_EXT_SET = frozenset(ext.lower() for ext in VIDEO_EXTENSIONS)
 
 # 5) Output folders
 DIR_OVER   = Path("over")
 DIR_OUTPUT = Path("output")
 
+# 6) Seconds between progress-line refreshes
+PROGRESS_INTERVAL = 0.5
+
+# 7) Pipe buffer for FFmpeg output, and how many FFmpeg log lines are kept
+#    in memory (saved, gzipped, only on failure)
+PIPE_BUFSIZE   = 64 * 1024
+LOG_TAIL_LINES = 2000
+
+# 8) Decode-once backend: Pass 1 also spills the decoded video here as y4m
+#    (ideally tmpfs) so Pass 2 doesn't decode the source again.
+#    Set to None to always decode the source in both passes.
+Y4M_CACHE_DIR = Path("/dev/shm")
+
+# 9) Parallelism: FFmpeg threads budgeted per concurrent job
+THREADS_PER_JOB = 8
+
+# 10) ffprobe results cache, keyed by (path, mtime, size)
+PROBE_CACHE_FILE = DIR_OVER / ".probe_cache.json"
+_PROBE_CACHE = None
+_PROBE_CACHE_LOCK = threading.Lock()
+
+# 11) Pass 1 stats cache: reruns of the same content skip Pass 1. Only stats
+#     from a Pass 1 that read the source itself are stored (after a cache hit
+#     Pass 2 decodes the source too). Nothing prunes this directory; delete
+#     it by hand to reclaim the space.
+STATS_CACHE_DIR    = Path(".svp-cache")
+STATS_SAMPLE_BYTES = 16 * 1024 * 1024
+
+# 12) Short clips (≤ this many seconds) with matching format are encoded
+#     together through the concat demuxer and split afterwards
+GROUP_MAX_SECONDS = 60
+
+# Set in each worker process; serialises the final moves across jobs.
+_MOVE_LOCK = None
+# Set in each worker process; bytes of Y4M_CACHE_DIR claimed by running jobs.
+_Y4M_RESERVED = None
+
 # ----------------------------------------------------------------------------
 #  HELPERS: human_readable_size, ffprobe→summary, print_comparison
 # ----------------------------------------------------------------------------
@@ -76,33 +144,101 @@ def human_readable_size(num_bytes: int) -> str:
     mb = num_bytes / (1024 * 1024)
     return f"{mb:.2f} MB"
 
-def run_ffprobe(path: Path) -> dict:
+# Only the fields extract_summary() reads; keeps ffprobe's JSON tiny.
+FFPROBE_ENTRIES = (
+    "format=duration,bit_rate,size"
+    ":stream=codec_type,codec_name,width,height,avg_frame_rate,r_frame_rate"
+    ",color_primaries,color_transfer,color_space,pix_fmt,sample_rate,channels"
+    ":stream_tags=rotate:stream_side_data=rotation"
+)
+
+def _run_ffprobe_uncached(path: Path) -> dict:
     """
-    Run ffprobe on `path` and return a JSON‐parsed dict of 'format' and 'streams'.
-    Returns {} on failure.
+    Run ffprobe on `path` (restricted to FFPROBE_ENTRIES) and return the
+    summary dict produced by extract_summary().
+    Every field is None on failure.
     """
     cmd = [
         FFMPEG_CMD.replace("ffmpeg", "ffprobe"),
         "-v", "quiet",
         "-print_format", "json",
-        "-show_format",
-        "-show_streams",
+        "-show_entries", FFPROBE_ENTRIES,
         str(path)
     ]
     try:
         raw = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
-        return json.loads(raw)
+        return extract_summary(json.loads(raw))
     except subprocess.CalledProcessError:
+        return extract_summary({})
+
+def _load_probe_cache() -> dict:
+    """Read PROBE_CACHE_FILE ({} if missing or unreadable)."""
+    try:
+        with PROBE_CACHE_FILE.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
         return {}
 
+def _save_probe_entry(key: str, entry: dict):
+    """
+    Merge one entry into PROBE_CACHE_FILE (re-read first, atomic replace).
+    The read-merge-replace runs under an flock on a sibling lock file, so
+    parallel worker processes can't drop each other's entries.
+    """
+    tmp = PROBE_CACHE_FILE.with_name(f"{PROBE_CACHE_FILE.name}.{os.getpid()}.tmp")
+    try:
+        with PROBE_CACHE_FILE.with_name(PROBE_CACHE_FILE.name + ".lock").open("a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            disk = _load_probe_cache()
+            disk[key] = entry
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(disk, f)
+            os.replace(tmp, PROBE_CACHE_FILE)
+    except OSError:
+        pass
+
+def run_ffprobe(path: Path) -> dict:
+    """
+    Memoised _run_ffprobe_uncached(): results are keyed by the resolved path
+    and validated against (st_mtime_ns, st_size), both in memory and in
+    PROBE_CACHE_FILE so reruns of the batch skip the ffprobe spawn.
+    """
+    global _PROBE_CACHE
+    try:
+        st = os.stat(path)
+    except OSError:
+        return _run_ffprobe_uncached(path)
+    key = str(Path(path).resolve())
+
+    with _PROBE_CACHE_LOCK:
+        if _PROBE_CACHE is None:
+            _PROBE_CACHE = _load_probe_cache()
+        entry = _PROBE_CACHE.get(key)
+    if (entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size
+            and entry["summary"].keys() == _SUMMARY_FIELDS):
+        return dict(entry["summary"])
+
+    summary = _run_ffprobe_uncached(path)
+    if summary["duration"] is None and summary["video_codec"] is None:
+        return summary                  # probe failed; don't cache it
+    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "summary": summary}
+    with _PROBE_CACHE_LOCK:
+        _PROBE_CACHE[key] = entry
+        _save_probe_entry(key, entry)
+    return dict(summary)
+
 def extract_summary(probe_info: dict) -> dict:
     """
     Given ffprobe JSON, extract:
       - duration (sec, float)
       - bit_rate (bits/sec, int)
       - file_size (bytes, int)
-      - video_codec (str), width (int), height (int)
-      - audio_codec (str)
+      - video_codec (str), width (int), height (int), fps (float)
+      - vfr (bool: avg_frame_rate differs from r_frame_rate)
+      - color_primaries, color_trc, colorspace (str; None when unspecified)
+      - pix_fmt (str), rotation (int degrees, display matrix or "rotate" tag)
+      - audio_codec (str), sample_rate (int), channels (int)
     Returns a dict; missing fields stay None.
     """
     summary = {
@@ -112,7 +248,16 @@ def extract_summary(probe_info: dict) -> dict:
         "video_codec": None,
         "width": None,
         "height": None,
-        "audio_codec": None
+        "fps": None,
+        "vfr": None,
+        "color_primaries": None,
+        "color_trc": None,
+        "colorspace": None,
+        "pix_fmt": None,
+        "rotation": None,
+        "audio_codec": None,
+        "sample_rate": None,
+        "channels": None
     }
 
     fmt = probe_info.get("format", {})
@@ -132,13 +277,35 @@ def extract_summary(probe_info: dict) -> dict:
             summary["video_codec"] = s.get("codec_name")
             summary["width"]      = s.get("width")
             summary["height"]     = s.get("height")
+            num, _, den = (s.get("avg_frame_rate") or "").partition("/")
+            if num.isdigit() and den.isdigit() and int(den):
+                summary["fps"] = int(num) / int(den)
+            if s.get("avg_frame_rate") and s.get("r_frame_rate"):
+                summary["vfr"] = s["avg_frame_rate"] != s["r_frame_rate"]
+            for key, field in (("color_primaries", "color_primaries"),
+                               ("color_trc", "color_transfer"),
+                               ("colorspace", "color_space")):
+                if s.get(field) not in (None, "", "unknown"):
+                    summary[key] = s[field]
+            summary["pix_fmt"] = s.get("pix_fmt")
+            # the legacy tag is clockwise, the display matrix counter-clockwise
+            rotation = -float(s.get("tags", {}).get("rotate", 0))
+            for side_data in s.get("side_data_list", []):
+                rotation = side_data.get("rotation", rotation)
+            summary["rotation"] = int(float(rotation)) % 360
         elif s.get("codec_type") == "audio" and summary["audio_codec"] is None:
             summary["audio_codec"] = s.get("codec_name")
+            sr = s.get("sample_rate")
+            summary["sample_rate"] = int(sr) if sr else None
+            summary["channels"] = s.get("channels")
         if summary["video_codec"] and summary["audio_codec"]:
             break
 
     return summary
 
+# Cached summaries written before a field was added are probed again.
+_SUMMARY_FIELDS = extract_summary({}).keys()
+
 def format_duration(seconds: float) -> str:
     """Convert seconds → 'HH:MM:SS', or 'N/A' if None."""
     if seconds is None:
@@ -155,7 +322,7 @@ def format_bitrate(bits_per_sec: int) -> str:
     mbps = bits_per_sec / 1_000_000
     return f"{mbps:.2f} Mbps"
 
-def print_comparison(orig: Path, comp: Path):
+def print_comparison(orig: Path, comp: Path, sizes: tuple = None):
     """
     Use ffprobe on both `orig` and `comp` to print a side-by-side table:
       • Duration
@@ -163,13 +330,19 @@ def print_comparison(orig: Path, comp: Path):
       • File size
       • Video codec & resolution
       • Audio codec
+    `sizes` = (orig_bytes, comp_bytes), when already known, is used for the
+    "File size" row instead of ffprobe's format.size.
+    Returns the two summary dicts (original, compressed).
     """
     print("  ↳ Running ffprobe comparison…")
-    orig_info = run_ffprobe(orig)
-    comp_info = run_ffprobe(comp)
-
-    orig_sum = extract_summary(orig_info)
-    comp_sum = extract_summary(comp_info)
+    # The two probes are independent; overlap their latency.
+    # Only the original goes through the cache – `comp` is a temp file.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        orig_future = ex.submit(run_ffprobe, orig)
+        comp_future = ex.submit(_run_ffprobe_uncached, comp)
+        orig_sum, comp_sum = orig_future.result(), comp_future.result()
+    if sizes is not None:
+        orig_sum["file_size"], comp_sum["file_size"] = sizes
 
     rows = []
     rows.append([
@@ -205,30 +378,204 @@ def print_comparison(orig: Path, comp: Path):
         comp_sum["audio_codec"] or "N/A"
     ])
 
-    col0 = max(len(r[0]) for r in rows) + 2
-    col1 = max(len(r[1]) for r in rows) + 2
-    col2 = max(len(r[2]) for r in rows) + 2
+    # One pass for the column widths, one write for the whole table
+    # (also keeps it in one piece when parallel jobs share the console).
+    table = [["Property", "Original", "Compressed"]] + rows
+    widths = [max(map(len, col)) + 2 for col in zip(*table)]
+    lines = ["    " + "".join(f"{c:<{w}}" for c, w in zip(r, widths)) for r in table]
+    lines.insert(1, "    " + "-" * sum(widths))
+    sys.stdout.write("\n" + "\n".join(lines) + "\n\n")
+    return orig_sum, comp_sum
+
+def fast_move(src: Path, dst: Path):
+    """
+    Move `src` → `dst`, overwriting `dst`. Uses an atomic os.replace (no data
+    copy) and only falls back to shutil.move across filesystems.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), str(dst))
+
+@contextmanager
+def drop_page_cache_after(path: Path, drop: bool = True):
+    """
+    If `drop`, evict `path`'s pages from the page cache on exit
+    (POSIX_FADV_DONTNEED) so a once-read source doesn't crowd out the rest
+    of the cache. The page cache is shared, so this also drops what FFmpeg
+    read through its own descriptor. A no-op where posix_fadvise is
+    unavailable.
+    """
+    if not drop or not hasattr(os, "posix_fadvise"):
+        yield
+        return
+    yield
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def run_ffmpeg_with_progress(cmd: list, log_path: Path, stdin=None):
+    """
+    Run an FFmpeg command built with "-nostats -progress pipe:1".
+    stdout carries the "key=value" progress frames, which are folded into a
+    single status line reprinted at most every PROGRESS_INTERVAL seconds.
+    stderr (the human log) is kept in memory – only the last LOG_TAIL_LINES
+    lines – and written gzip-compressed to `log_path` only if FFmpeg fails.
+    `stdin` lets the command read "-i -" from another process's pipe.
+    Returns (exit code, list of retained log lines).
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdin=stdin,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=PIPE_BUFSIZE
+    )
+    log_tail = deque(maxlen=LOG_TAIL_LINES)
+    drain = threading.Thread(target=log_tail.extend, args=(proc.stderr,), daemon=True)
+    drain.start()
+
+    # Read the progress pipe in large binary chunks; decode only what is printed.
+    frame = {}
+    last_print = 0.0
+    pending = b""
+    for chunk in iter(lambda: proc.stdout.read1(PIPE_BUFSIZE), b""):
+        *complete, pending = (pending + chunk).split(b"\n")
+        for raw in complete:
+            key, _, value = raw.strip().partition(b"=")
+            frame[key] = value
+            if key != b"progress":
+                continue
+            now = time.monotonic()
+            if value == b"end" or now - last_print >= PROGRESS_INTERVAL:
+                last_print = now
+                get = lambda k: frame.get(k, b"?").decode("ascii", "ignore")
+                size = get(b"total_size")
+                sys.stdout.write(
+                    f"\r    frame={get(b'frame')} fps={get(b'fps')} "
+                    f"time={get(b'out_time')[:11]} "
+                    f"size={human_readable_size(int(size)) if size.isdigit() else 'N/A'} "
+                    f"speed={get(b'speed')}   "
+                )
+                sys.stdout.flush()
+    proc.wait()
+    drain.join()
+    sys.stdout.write("\n")
+
+    lines = [raw.decode("utf-8", "ignore").rstrip() for raw in log_tail]
+    if proc.returncode != 0:
+        with gzip.open(log_path, "wt", encoding="utf-8") as lf:
+            lf.write("\n".join(lines) + "\n")
+    return proc.returncode, lines
+
+def print_log_tail(lines: list, count: int = 5):
+    """Echo the last `count` FFmpeg log lines for quick debugging."""
+    for line in lines[-count:]:
+        print("    " + line)
+
+def pass1_stats_key(input_path: Path, size: int) -> str:
+    """
+    Cache key for Pass 1 stats: a hash of the file size plus its first and
+    last STATS_SAMPLE_BYTES, combined with the settings that shape Pass 1.
+    """
+    h = _content_hash()
+    h.update(str(size).encode())
+    with input_path.open("rb") as f:
+        h.update(f.read(STATS_SAMPLE_BYTES))
+        if size > 2 * STATS_SAMPLE_BYTES:
+            f.seek(-STATS_SAMPLE_BYTES, os.SEEK_END)
+            h.update(f.read(STATS_SAMPLE_BYTES))
+    params = hashlib.sha1(f"{PASS1_BITRATE}|{SVTAV1_PARAMS_PASS1}".encode()).hexdigest()[:12]
+    return f"{h.hexdigest()[:32]}_{params}"
+
+def restore_pass1_stats(key: str, passlog_base: str) -> bool:
+    """Copy cached "<key>-0.log[.mbtree]" to the passlog base; True on a hit."""
+    cached = STATS_CACHE_DIR / f"{key}-0.log"
+    if not cached.is_file():
+        return False
+    shutil.copyfile(cached, f"{passlog_base}-0.log")
+    mbtree = STATS_CACHE_DIR / f"{key}-0.log.mbtree"
+    if mbtree.is_file():
+        shutil.copyfile(mbtree, f"{passlog_base}-0.log.mbtree")
+    return True
 
-    print()
-    print(f"    {'Property'.ljust(col0)}{'Original'.ljust(col1)}{'Compressed'.ljust(col2)}")
-    print("    " + "-" * (col0 + col1 + col2))
-    for r in rows:
-        print(f"    {r[0].ljust(col0)}{r[1].ljust(col1)}{r[2].ljust(col2)}")
-    print()
+def store_pass1_stats(key: str, passlog_base: str):
+    """Save the freshly written Pass 1 stats under `key` for later reruns."""
+    STATS_CACHE_DIR.mkdir(exist_ok=True)
+    for suffix in ("-0.log", "-0.log.mbtree"):
+        src = Path(f"{passlog_base}{suffix}")
+        if src.is_file():
+            shutil.copyfile(src, STATS_CACHE_DIR / f"{key}{suffix}")
+
+def y4m_cache_path(input_path: Path, summary: dict, tag: str):
+    """
+    Pick a file in Y4M_CACHE_DIR for the decode-once backend, or None when
+    it is disabled, the source is already raw or variable frame rate (y4m
+    has no timestamps, so VFR video would be retimed against its audio), or
+    the decoded stream (estimated at 10-bit 4:2:0, i.e. 3 bytes/pixel)
+    won't fit with headroom.
+    Returns (path, reserved_bytes); hand both to release_y4m_cache when done.
+
+    Under --jobs the estimate is reserved in a counter shared by all workers,
+    so jobs starting together can't each see the same free space and jointly
+    fill the tmpfs. (A running job's bytes count against both its reservation
+    and the free space, which errs on the safe side.)
+    """
+    if Y4M_CACHE_DIR is None or not Y4M_CACHE_DIR.is_dir():
+        return None, 0
+    if summary["video_codec"] in (None, "rawvideo"):
+        return None, 0
+    if summary["vfr"] is not False:
+        return None, 0
+    if not (summary["width"] and summary["height"] and summary["fps"] and summary["duration"]):
+        return None, 0
+    estimate = summary["width"] * summary["height"] * 3 * summary["fps"] * summary["duration"]
+    needed = int(estimate * 1.1)
+    path = Y4M_CACHE_DIR / f"{input_path.stem}_{tag}.y4m"
+    if _Y4M_RESERVED is None:
+        if needed > shutil.disk_usage(Y4M_CACHE_DIR).free:
+            return None, 0
+        return path, 0
+    with _Y4M_RESERVED.get_lock():
+        if needed + _Y4M_RESERVED.value > shutil.disk_usage(Y4M_CACHE_DIR).free:
+            return None, 0
+        _Y4M_RESERVED.value += needed
+    return path, needed
+
+def release_y4m_cache(y4m_path: Path, reserved: int):
+    """Delete a y4m picked by y4m_cache_path and give back its reservation."""
+    y4m_path.unlink(missing_ok=True)
+    if reserved:
+        with _Y4M_RESERVED.get_lock():
+            _Y4M_RESERVED.value -= reserved
 
 # ----------------------------------------------------------------------------
 #  MAIN TWO-PASS FUNCTION (with real-time FFmpeg progress)
 # ----------------------------------------------------------------------------
 
-def process_video(input_path: Path):
+def process_video(input_path: Path, threads: int = None, results_path: Path = None):
     """
-    1) Build a unique passlog base using a timestamp.
-    2) Pass 1: FFmpeg (analysis-only, no audio, VBR mode) → stats written to "<base>-0.log".
+    0) `threads`, when given, is passed to FFmpeg as "-threads N" so that
+       concurrent jobs don't over-subscribe the CPU.
+    1) Build a unique passlog base using a nanosecond timestamp + pid.
+    2) Pass 1: FFmpeg (analysis-only, audio copied, VBR mode) → stats written to "<base>-0.log".
+       If Y4M_CACHE_DIR has room, the source is decoded once for Pass 1 and
+       the decoded y4m is reused as Pass 2's video input.
+       Also skipped when STATS_CACHE_DIR holds stats for the same content.
     3) Pass 2: FFmpeg (encode AV1 + Opus, VBR, using same base) → temp.mp4.
     4) Print real-time FFmpeg progress for both passes (frame, fps, time, size).
     5) ffprobe comparison (original vs. compressed).
     6) Move original → over/, compressed → output/.
     7) Remove FFmpeg’s internal two-pass log files ("<base>-0.log", "<base>-0.log.mbtree").
+    8) Append a JSON line describing the result to `results_path` (if given).
+    Returns that result dict, or None if the file failed.
     """
     print("\n" + "_" * 100)
     print(f"Processing: {input_path.name}")
@@ -240,78 +587,134 @@ def process_video(input_path: Path):
         print(f"  [Error] File not found: {input_path}")
         return
 
-    # 2) Unique passlog base (stem + timestamp)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # 2) Unique passlog base (stem + ns timestamp + pid, so parallel jobs
+    #    started in the same second never share a name)
+    ts = f"{time.time_ns():x}-{os.getpid():x}"
     passlog_base = f"{input_path.stem}_{ts}_svp"
 
-    pass1_log = Path(f"{input_path.stem}_{ts}_pass1.log")
-    pass2_log = Path(f"{input_path.stem}_{ts}_pass2.log")
+    pass1_log = Path(f"{input_path.stem}_{ts}_pass1.log.gz")    # written on error only
+    pass2_log = Path(f"{input_path.stem}_{ts}_pass2.log.gz")
     temp_filename = f"{input_path.stem}_{ts}.mp4"
     temp_path = Path(temp_filename)
 
-    # ------------------------------------------------------------------------
-    # PASS 1: analysis‐only, VBR (no audio → output to null)
-    # ------------------------------------------------------------------------
-    cmd_pass1 = [
-        FFMPEG_CMD,
-        "-hide_banner",
-        "-loglevel", "info",
-        "-y",
-        "-i", str(input_path),
-        "-c:v", "libsvtav1",
-        "-b:v", TARGET_BITRATE,
-        "-rc", "2",                         # VBR mode
-        "-svtav1-params", SVTAV1_PARAMS,
-        "-pass", "1",
-        "-passlogfile", passlog_base,
-        "-an",                              # disable audio on Pass 1
-        "-f", "null", os.devnull
-    ]
+    thread_args = ["-threads", str(threads)] if threads else []
+    # SVT-AV1's own thread pool ("lp") sized to the same budget.
+    svt_lp = f":lp={threads}" if threads else ""
 
-    print(f"  → Pass 1 (analysis) @ {TARGET_BITRATE} VBR → see progress below, logs → '{pass1_log.name}'")
-    start1 = time.perf_counter()
-    with pass1_log.open("w", encoding="utf-8", errors="ignore") as lf:
-        # Launch FFmpeg as a subprocess, capturing stdout/stderr
-        proc = subprocess.Popen(
-            cmd_pass1,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1
-        )
-        # Read line by line and echo to both console & log file
-        for line in proc.stdout:
-            # Print exactly as FFmpeg prints (progress, frame=…, etc.)
-            sys.stdout.write(line)
-            lf.write(line)
-        proc.wait()
-    elapsed1 = time.perf_counter() - start1
+    y4m_path = None
+    stats_key = pass1_stats_key(input_path, orig_size)
+    if restore_pass1_stats(stats_key, passlog_base):
+        elapsed1 = 0.0
+        print(f"  • Pass 1 skipped → reused cached stats from '{STATS_CACHE_DIR}/'")
+    else:
+        # Decode once: a separate FFmpeg decodes the source, writing y4m both
+        # to Pass 1's stdin and to a cache file that Pass 2 reads back.
+        src_summary = run_ffprobe(input_path)
+        y4m_path, y4m_reserved = y4m_cache_path(input_path, src_summary, ts)
+        decoder = None
+        if y4m_path is not None:
+            decoder = subprocess.Popen(
+                [
+                    FFMPEG_CMD,
+                    "-hide_banner",
+                    "-loglevel", "error",
+                    "-nostdin",
+                    "-y",
+                    "-i", str(input_path),
+                    "-map", "0:v:0", "-strict", "-1", "-f", "yuv4mpegpipe", str(y4m_path),
+                    "-map", "0:v:0", "-strict", "-1", "-f", "yuv4mpegpipe", "pipe:1"
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+            pass1_input = ["-f", "yuv4mpegpipe", "-i", "-"]
+            pass1_audio = ["-an"]               # the y4m pipe carries no audio
+        else:
+            pass1_input = ["-i", str(input_path)]
+            # Remux (not encode) audio so FFmpeg's progress/out_time advances.
+            pass1_audio = ["-c:a", "copy"]
 
-    if proc.returncode != 0:
-        print(f"  [Error] Pass 1 exited with code {proc.returncode}. Check '{pass1_log.name}'.")
-        # Print first few lines for quick debugging:
-        with pass1_log.open("r", encoding="utf-8", errors="ignore") as lf:
-            for i, line in enumerate(lf):
-                if i >= 5:
-                    break
-                print("    " + line.rstrip())
-        return
+        # --------------------------------------------------------------------
+        # PASS 1: analysis‐only, VBR (audio copied → output to null), fast preset
+        # --------------------------------------------------------------------
+        cmd_pass1 = [
+            FFMPEG_CMD,
+            "-hide_banner",
+            "-loglevel", "info",
+            "-nostats",
+            "-progress", "pipe:1",
+            "-y",
+            *pass1_input,
+            "-c:v", "libsvtav1",
+            "-b:v", PASS1_BITRATE,
+            "-rc", "2",                         # VBR mode
+            "-svtav1-params", SVTAV1_PARAMS_PASS1 + svt_lp,
+            *thread_args,
+            "-pass", "1",
+            "-passlogfile", passlog_base,
+            *pass1_audio,
+            "-f", "null", os.devnull
+        ]
+
+        print(f"  → Pass 1 (analysis) @ {PASS1_BITRATE} VBR → see progress below")
+        start1 = time.perf_counter()
+        # Keep the source cached afterwards unless Pass 2 won't re-read it.
+        with drop_page_cache_after(input_path, drop=y4m_path is not None):
+            returncode, log_lines = run_ffmpeg_with_progress(
+                cmd_pass1, pass1_log, stdin=decoder.stdout if decoder else None
+            )
+            if decoder is not None:
+                # Close our end first so a decoder stuck on a full pipe gets EPIPE.
+                decoder.stdout.close()
+                if decoder.wait() != 0 and returncode == 0:
+                    returncode = decoder.returncode
+        elapsed1 = time.perf_counter() - start1
 
-    print(f"  • Pass 1 completed in {elapsed1:.1f} sec → stats in '{passlog_base}-0.log'")
+        if returncode != 0:
+            if y4m_path is not None:
+                release_y4m_cache(y4m_path, y4m_reserved)
+            print(f"  [Error] Pass 1 exited with code {returncode}. Check '{pass1_log.name}'.")
+            print_log_tail(log_lines)
+            return
+
+        print(f"  • Pass 1 completed in {elapsed1:.1f} sec → stats in '{passlog_base}-0.log'")
+        if y4m_path is None:
+            # y4m-fed stats describe the decoded stream, not what Pass 2 reads on a cache hit
+            store_pass1_stats(stats_key, passlog_base)
 
     # ------------------------------------------------------------------------
     # PASS 2: encode AV1 + Opus (VBR, using passlog_base)
     # ------------------------------------------------------------------------
+    pass2_params = SVTAV1_PARAMS + svt_lp
+    if y4m_path is not None:
+        # Video from Pass 1's decoded y4m, audio/metadata from the source.
+        pass2_input = [
+            "-f", "yuv4mpegpipe", "-i", str(y4m_path),
+            "-i", str(input_path),
+            "-map", "0:v:0", "-map", "1:a:0?", "-map_metadata", "1"
+        ]
+        # y4m carries no colour description; restore the source's (HDR10/HLG etc.)
+        for opt, key in (("-color_primaries", "color_primaries"),
+                         ("-color_trc", "color_trc"),
+                         ("-colorspace", "colorspace")):
+            if src_summary[key]:
+                pass2_input += [opt, src_summary[key]]
+    else:
+        pass2_input = ["-i", str(input_path)]
+
     cmd_pass2 = [
         FFMPEG_CMD,
         "-hide_banner",
         "-loglevel", "info",
+        "-nostats",
+        "-progress", "pipe:1",
         "-y",
-        "-i", str(input_path),
+        *pass2_input,
         "-c:v", "libsvtav1",
         "-b:v", TARGET_BITRATE,
         "-rc", "2",                         # VBR mode
-        "-svtav1-params", SVTAV1_PARAMS,
+        "-svtav1-params", pass2_params,
+        *thread_args,
         "-pass", "2",
         "-passlogfile", passlog_base,
         "-c:a", AUDIO_CODEC,
@@ -321,94 +724,366 @@ def process_video(input_path: Path):
 
     print(f"  → Pass 2 (encode AV1 + Opus) → '{temp_filename}' (progress below)")
     start2 = time.perf_counter()
-    with pass2_log.open("w", encoding="utf-8", errors="ignore") as lf:
-        proc = subprocess.Popen(
-            cmd_pass2,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1
-        )
-        for line in proc.stdout:
-            sys.stdout.write(line)
-            lf.write(line)
-        proc.wait()
+    with drop_page_cache_after(input_path):
+        returncode, log_lines = run_ffmpeg_with_progress(cmd_pass2, pass2_log)
     elapsed2 = time.perf_counter() - start2
+    if y4m_path is not None:
+        release_y4m_cache(y4m_path, y4m_reserved)
 
-    if proc.returncode != 0:
-        print(f"  [Error] Pass 2 exited with code {proc.returncode}. Check '{pass2_log.name}'.")
-        with pass2_log.open("r", encoding="utf-8", errors="ignore") as lf:
-            for i, line in enumerate(lf):
-                if i >= 5:
-                    break
-                print("    " + line.rstrip())
+    if returncode != 0:
+        print(f"  [Error] Pass 2 exited with code {returncode}. Check '{pass2_log.name}'.")
+        print_log_tail(log_lines)
         return
 
-    print(f"  • Pass 2 completed in {elapsed2:.1f} sec → compressed size: {human_readable_size(temp_path.stat().st_size)}")
+    comp_size = temp_path.stat().st_size
+    print(f"  • Pass 2 completed in {elapsed2:.1f} sec → compressed size: {human_readable_size(comp_size)}")
 
     # ------------------------------------------------------------------------
     # FFPROBE comparison (original vs. compressed)
     # ------------------------------------------------------------------------
     print(f"  • Original size  : {human_readable_size(orig_size)}")
-    print(f"  • Compressed size: {human_readable_size(temp_path.stat().st_size)}")
-    print_comparison(input_path, temp_path)
+    print(f"  • Compressed size: {human_readable_size(comp_size)}")
+    orig_sum, comp_sum = print_comparison(input_path, temp_path, sizes=(orig_size, comp_size))
 
     # ------------------------------------------------------------------------
     # CLEAN UP libsvtav1 two-pass internal logs:
     #   "<passlog_base>-0.log" and "<passlog_base>-0.log.mbtree"
     # ------------------------------------------------------------------------
-    for suffix in ["-0.log", "-0.log.mbtree"]:
-        internal_log = Path(f"{passlog_base}{suffix}")
-        if internal_log.exists():
-            internal_log.unlink()
-
-    # (Optional) delete human logs automatically:
-    # pass1_log.unlink()
-    # pass2_log.unlink()
+    for suffix in ("-0.log", "-0.log.mbtree"):
+        Path(f"{passlog_base}{suffix}").unlink(missing_ok=True)
 
     # ------------------------------------------------------------------------
     # MOVE original → over/   and   compressed → output/
     # ------------------------------------------------------------------------
-    target_over = DIR_OVER / input_path.name
-    if target_over.exists():
-        target_over.unlink()
-    shutil.move(str(input_path), str(target_over))
-    print(f"  ✔ Moved original → '{target_over}'")
-
-    final_name = f"{input_path.stem}.mp4"
-    target_out = DIR_OUTPUT / final_name
-    if target_out.exists():
-        target_out.unlink()
-    shutil.move(str(temp_path), str(target_out))
-    print(f"  ✔ Moved compressed → '{target_out}'")
+    with _MOVE_LOCK if _MOVE_LOCK is not None else nullcontext():
+        target_over = DIR_OVER / input_path.name
+        fast_move(input_path, target_over)
+        print(f"  ✔ Moved original → '{target_over}'")
+
+        final_name = f"{input_path.stem}.mp4"
+        target_out = DIR_OUTPUT / final_name
+        fast_move(temp_path, target_out)
+        print(f"  ✔ Moved compressed → '{target_out}'")
+
+        result = {
+            "input": input_path.name,
+            "output": str(target_out),
+            "orig_size": orig_size,
+            "comp_size": comp_size,
+            "orig_bitrate": orig_sum["bit_rate"],
+            "comp_bitrate": comp_sum["bit_rate"],
+            "elapsed1": round(elapsed1, 3),
+            "elapsed2": round(elapsed2, 3),
+            "svtav1_params": pass2_params,
+        }
+        if results_path is not None:
+            with results_path.open("a", encoding="utf-8") as rf:
+                rf.write(json.dumps(result) + "\n")
+
+    return result
+
+# ----------------------------------------------------------------------------
+#  GROUPED TWO-PASS (many short clips → one encode, split afterwards)
+# ----------------------------------------------------------------------------
+
+def plan_groups(video_files: list):
+    """
+    Probe every file and cluster the short ones (≤ GROUP_MAX_SECONDS) that
+    share resolution, rotation, frame rate, pixel format, codecs and audio
+    sample rate/channels (only the first clip's display matrix and audio
+    layout survive the concat). Returns (singles, groups) where
+    each group is a list of (path, duration) with at least two members.
+    """
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        summaries = list(ex.map(run_ffprobe, video_files))
+
+    singles, clusters = [], {}
+    for path, summ in zip(video_files, summaries):
+        key = (summ["width"], summ["height"], summ["fps"],
+               summ["video_codec"], summ["rotation"], summ["pix_fmt"],
+               summ["audio_codec"], summ["sample_rate"], summ["channels"])
+        if None in key[:6] or not summ["duration"] or summ["duration"] > GROUP_MAX_SECONDS:
+            singles.append(path)
+        else:
+            clusters.setdefault(key, []).append((path, summ["duration"]))
+
+    groups = []
+    for members in clusters.values():
+        if len(members) > 1:
+            groups.append(members)
+        else:
+            singles.append(members[0][0])
+    return sorted(singles), groups
+
+def process_group(members: list, threads: int = None, results_path: Path = None):
+    """
+    Encode a group from plan_groups() as one concatenated two-pass run:
+    1) Write a concat-demuxer list and force key frames at each clip boundary.
+    2) Pass 1 + Pass 2 over the whole list → "group_<ts>.mp4".
+    3) Split it back with the segment muxer (stream copy) at the same times,
+       then remux each segment with its source's global metadata
+       (creation_time etc.), which the split alone would lose.
+    4) Move originals → over/, segments → output/<stem>.mp4, log results.
+    Returns the list of per-file result dicts, or None if anything failed
+    (the caller then falls back to process_video for these files).
+    """
+    print("\n" + "_" * 100)
+    print(f"Processing group of {len(members)}: " + ", ".join(p.name for p, _ in members))
+
+    ts = f"{time.time_ns():x}-{os.getpid():x}"
+    base = f"group_{ts}"
+    list_file = Path(f"{base}_concat.txt")
+    passlog_base = f"{base}_svp"
+    joined = Path(f"{base}.mp4")
+    segment_pattern = f"{base}_%03d.mp4"
+
+    boundaries, t = [], 0.0
+    for _, duration in members[:-1]:
+        t += duration
+        boundaries.append(f"{t:.3f}")
+    cut_times = ",".join(boundaries)
+
+    def quote(path):
+        return str(path.resolve()).replace("'", "'\\''")
+    list_file.write_text("".join(f"file '{quote(p)}'\n" for p, _ in members), encoding="utf-8")
+
+    thread_args = ["-threads", str(threads)] if threads else []
+    svt_lp = f":lp={threads}" if threads else ""
+    common = [
+        FFMPEG_CMD,
+        "-hide_banner",
+        "-loglevel", "info",
+        "-nostats",
+        "-progress", "pipe:1",
+        "-y",
+        "-f", "concat", "-safe", "0", "-i", str(list_file),
+        "-c:v", "libsvtav1",
+        "-rc", "2",                         # VBR mode
+        "-force_key_frames", cut_times,
+        *thread_args,
+        "-passlogfile", passlog_base,
+    ]
+    cmd_pass1 = common + [
+        "-b:v", PASS1_BITRATE,
+        "-svtav1-params", SVTAV1_PARAMS_PASS1 + svt_lp,
+        "-pass", "1",
+        "-c:a", "copy",
+        "-f", "null", os.devnull
+    ]
+    cmd_pass2 = common + [
+        "-b:v", TARGET_BITRATE,
+        "-svtav1-params", SVTAV1_PARAMS + svt_lp,
+        "-pass", "2",
+        "-c:a", AUDIO_CODEC,
+        "-b:a", AUDIO_BITRATE,
+        str(joined)
+    ]
+    cmd_split = [
+        FFMPEG_CMD,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-nostdin",
+        "-y",
+        "-i", str(joined),
+        "-map", "0",
+        "-c", "copy",
+        "-f", "segment",
+        "-segment_times", cut_times,
+        "-reset_timestamps", "1",
+        segment_pattern
+    ]
+    segments = [Path(segment_pattern % i) for i in range(len(members))]
+
+    def cleanup(keep_segments=False):
+        list_file.unlink(missing_ok=True)
+        joined.unlink(missing_ok=True)
+        for suffix in ("-0.log", "-0.log.mbtree"):
+            Path(f"{passlog_base}{suffix}").unlink(missing_ok=True)
+        if not keep_segments:
+            for seg in segments:
+                seg.unlink(missing_ok=True)
+
+    print(f"  → Pass 1 (analysis) @ {PASS1_BITRATE} VBR over concat list")
+    start1 = time.perf_counter()
+    returncode, log_lines = run_ffmpeg_with_progress(cmd_pass1, Path(f"{base}_pass1.log.gz"))
+    elapsed1 = time.perf_counter() - start1
+    if returncode == 0:
+        print(f"  → Pass 2 (encode AV1 + Opus) → '{joined}'")
+        start2 = time.perf_counter()
+        returncode, log_lines = run_ffmpeg_with_progress(cmd_pass2, Path(f"{base}_pass2.log.gz"))
+        elapsed2 = time.perf_counter() - start2
+    if returncode == 0:
+        returncode = subprocess.run(cmd_split, stdout=subprocess.DEVNULL).returncode
+    for (src, _), seg in zip(members, segments):
+        if returncode != 0 or not seg.is_file():
+            break
+        tagged = seg.with_name(f"{seg.stem}_meta.mp4")
+        returncode = subprocess.run([
+            FFMPEG_CMD, "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+            "-i", str(seg), "-i", str(src),
+            "-map", "0", "-map_metadata", "1", "-c", "copy",
+            str(tagged)
+        ], stdout=subprocess.DEVNULL).returncode
+        if returncode == 0:
+            os.replace(tagged, seg)
+        else:
+            tagged.unlink(missing_ok=True)
+    if returncode != 0 or not all(seg.is_file() for seg in segments) \
+            or Path(segment_pattern % len(members)).exists():
+        print(f"  [Error] Grouped encode failed (code {returncode}); falling back to per-file encodes.")
+        print_log_tail(log_lines)
+        Path(segment_pattern % len(members)).unlink(missing_ok=True)
+        cleanup()
+        return None
+    cleanup(keep_segments=True)
+    print(f"  • Group encoded in {elapsed1 + elapsed2:.1f} sec and split into {len(segments)} file(s)")
+
+    results = []
+    with _MOVE_LOCK if _MOVE_LOCK is not None else nullcontext():
+        for (src, duration), seg in zip(members, segments):
+            orig_size = src.stat().st_size
+            comp_size = seg.stat().st_size
+            orig_bitrate = run_ffprobe(src)["bit_rate"]
+            fast_move(src, DIR_OVER / src.name)
+            target_out = DIR_OUTPUT / f"{src.stem}.mp4"
+            fast_move(seg, target_out)
+            print(f"  ✔ {src.name}: {human_readable_size(orig_size)} → "
+                  f"{human_readable_size(comp_size)} → '{target_out}'")
+            result = {
+                "input": src.name,
+                "output": str(target_out),
+                "orig_size": orig_size,
+                "comp_size": comp_size,
+                "orig_bitrate": orig_bitrate,
+                "comp_bitrate": int(comp_size * 8 / duration),
+                "elapsed1": round(elapsed1, 3),
+                "elapsed2": round(elapsed2, 3),
+                "svtav1_params": SVTAV1_PARAMS + svt_lp,
+                "group": base,
+            }
+            if results_path is not None:
+                with results_path.open("a", encoding="utf-8") as rf:
+                    rf.write(json.dumps(result) + "\n")
+            results.append(result)
+    return results
 
 # ----------------------------------------------------------------------------
 #  MAIN ENTRY POINT
 # ----------------------------------------------------------------------------
 
-def main():
+def _init_worker(lock, slot_counter, threads, y4m_reserved):
+    """
+    Pool initializer: share the move lock and the y4m reservation counter
+    with each worker process and, on Linux, pin the worker to its own slice
+    of `threads` CPUs. FFmpeg inherits the affinity, so concurrent jobs stay
+    off each other's cores.
+    """
+    global _MOVE_LOCK, _Y4M_RESERVED
+    _MOVE_LOCK = lock
+    _Y4M_RESERVED = y4m_reserved
+
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+    if hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        mine = cpus[slot * threads:(slot + 1) * threads]
+        if mine:
+            os.sched_setaffinity(0, mine)
+
+def parse_args(argv=None):
+    cpu = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Batch two-pass libsvtav1 encoder")
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=max(1, cpu // THREADS_PER_JOB),
+        help="number of files to encode concurrently "
+             f"(default: cpu_count // {THREADS_PER_JOB})"
+    )
+    parser.add_argument(
+        "--no-group", action="store_true",
+        help=f"encode every file on its own, even short clips (≤ {GROUP_MAX_SECONDS}s) "
+             "that could share one concatenated encode"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = max(1, args.jobs)
+
     # Ensure output directories exist
     DIR_OVER.mkdir(exist_ok=True)
     DIR_OUTPUT.mkdir(exist_ok=True)
 
     cwd = Path.cwd()
-    video_files = []
 
-    # Collect any file matching VIDEO_EXTENSIONS (case-insensitive)
-    for ext in VIDEO_EXTENSIONS:
-        video_files.extend(cwd.glob(f"*{ext}"))
-        video_files.extend(cwd.glob(f"*{ext.upper()}"))
+    # Collect any file matching VIDEO_EXTENSIONS (case-insensitive),
+    # in a single directory pass
+    video_files = []
+    with os.scandir(cwd) as it:
+        for entry in it:
+            stem, dot, suf = entry.name.rpartition(".")
+            if stem and "." + suf.lower() in VIDEO_EXT_SET and entry.is_file():
+                video_files.append(Path(entry.path))
 
     if not video_files:
         print("No video files found with those extensions.")
         return
 
     video_files = sorted(video_files)
-    for idx, vid in enumerate(video_files, start=1):
-        print(f"\n>>> ({idx}/{len(video_files)})")
-        process_video(vid)
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    results_path = DIR_OUTPUT / f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    if args.no_group:
+        singles, groups = video_files, []
+    else:
+        singles, groups = plan_groups(video_files)
+        if groups:
+            print(f"Grouping {sum(len(g) for g in groups)} short clip(s) into {len(groups)} concatenated encode(s)")
+
+    results = []
+    fallback = []
+    if jobs == 1:
+        for members in groups:
+            grouped = process_group(members, threads, results_path)
+            if grouped is None:
+                fallback.extend(p for p, _ in members)
+            else:
+                results.extend(grouped)
+        singles = sorted(singles + fallback)
+        for idx, vid in enumerate(singles, start=1):
+            print(f"\n>>> ({idx}/{len(singles)})")
+            results.append(process_video(vid, threads, results_path))
+    else:
+        print(f"Encoding {len(video_files)} file(s) with {jobs} parallel jobs × {threads} threads")
+        lock = multiprocessing.Lock()
+        slot_counter = multiprocessing.Value("i", 0)
+        y4m_reserved = multiprocessing.Value("q", 0)
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(lock, slot_counter, threads, y4m_reserved)
+        ) as ex:
+            encode_one = partial(process_video, threads=threads, results_path=results_path)
+            group_futures = [
+                (members, ex.submit(process_group, members, threads, results_path))
+                for members in groups
+            ]
+            results = list(ex.map(encode_one, singles))
+            for members, future in group_futures:
+                grouped = future.result()
+                if grouped is None:
+                    fallback.extend(p for p, _ in members)
+                else:
+                    results.extend(grouped)
+            results.extend(ex.map(encode_one, sorted(fallback)))
 
+    done = [r for r in results if r]
     print("\n" + "_" * 60)
+    if done:
+        orig_total = sum(r["orig_size"] for r in done)
+        comp_total = sum(r["comp_size"] for r in done)
+        print(f"Encoded {len(done)}/{len(video_files)} file(s): "
+              f"{human_readable_size(orig_total)} → {human_readable_size(comp_total)} "
+              f"(saved {human_readable_size(orig_total - comp_total)}); details in '{results_path}'")
     print("Batch two-pass libsvtav1 job completed at:", datetime.now().strftime("%d/%m/%Y %H:%M:%S"))
 
 if __name__ == "__main__":
@@ -1,24 +1,34 @@
 # Author: Miguel Martinez Lopez
 # Version: 0.4
 
-import tkinter as tk
-from tkinter import ttk
-from tkinter import StringVar
-import tkinter.font as tkFont
-from tkinter.ttk import Style
-from tkinter.constants import *
-
+import mmap
+import os
+import stat
 import struct
 import sys
 import argparse
 import logging
 
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+try:
+	import numba
+except ImportError:
+	numba = None
+
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 PACKET_SYNC_BYTE = 0x47
 MAX_PACKET_COUNT = 1450000
+READ_CHUNK = 1 << 20
+READ_AHEAD = 1 << 16
 
 class SystemClock:
+	__slots__ = ('PCR_base_hi', 'PCR_base_lo', 'PCR_extension')
+
 	def __init__(self):
 		self.PCR_base_hi = 0x0
 		self.PCR_base_lo = 0x0
@@ -31,6 +41,8 @@ class SystemClock:
 		return self.PCR_base_hi, self.PCR_base_lo, self.PCR_extension
 
 class PESPacketInfo:
+	__slots__ = ('PTS_hi', 'PTS_lo', 'streamID', 'AUType')
+
 	def __init__(self):
 		self.PTS_hi = 0
 		self.PTS_lo = 0
@@ -50,48 +62,51 @@ class PESPacketInfo:
 	def getAUType(self):
 		return self.AUType
 
-def readFile(filehandle, startPos, width):
-	"""Return a big-endian integer read from *filehandle* starting at
-	*startPos* with the given byte *width* (1, 2 or 4)."""
+# stream_IDs whose PES packets are parsed without the optional PES header:
+# program_stream_map, padding_stream, ECM, EMM, program_stream_directory,
+# ancillary_stream and H.222.1 type E
+NO_PES_HEADER_STREAM_IDS = frozenset((0xBC, 0xBE, 0xF0, 0xF1, 0xFF, 0xF9, 0xF8))
 
-	filehandle.seek(startPos,0)
-	if width == 4:
-		string = filehandle.read(4)
-		if string == '':
-			raise IOError
-		return struct.unpack('>L',string[:4])[0]
-	elif width == 2:
-		string = filehandle.read(2)
-		if string == '':
-			raise IOError
-		return struct.unpack('>H',string[:2])[0]
-	elif width == 1:
-		string = filehandle.read(1)
-		if string == '':
-			raise IOError
-		return struct.unpack('>B',string[:1])[0]
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>L')
+_HDR = struct.Struct('>I').unpack_from
+_UNPACKERS = {2: _U16.unpack_from, 4: _U32.unpack_from}
 
-def parseAdaptation_Field(filehandle, startPos, PCR):
+def readFile(mm, startPos, width):
+	"""Return a big-endian integer read from the memory-mapped TS *mm*
+	starting at *startPos* with the given byte *width* (1, 2 or 4).
+	Raises IOError when the read runs past the end of the file."""
+
+	try:
+		if width == 1:
+			return mm[startPos]
+		return _UNPACKERS[width](mm, startPos)[0]
+	except (IndexError, struct.error):
+		raise IOError
+
+def parseAdaptation_Field(mm, startPos, PCR):
 	n = startPos
 	flags = 0
-	adaptation_field_length = readFile(filehandle,n,1)
+	adaptation_field_length = readFile(mm,n,1)
 	if adaptation_field_length > 0:
-		flags = readFile(filehandle,n+1,1)
+		flags = readFile(mm,n+1,1)
 		PCR_flag = (flags>>4)&0x1
 		if PCR_flag == 1:
-			PCR1 = readFile(filehandle,n+2,4)
-			PCR2 = readFile(filehandle,n+6,2)
+			PCR1 = readFile(mm,n+2,4)
+			PCR2 = readFile(mm,n+6,2)
 			PCR_base_hi = (PCR1>>31)&0x1
 			PCR_base_lo = (PCR1<<1)+ ((PCR2>>15)&0x1)
 			PCR_ext = PCR2&0x1FF
-			PCR.setPCR(PCR_base_hi, PCR_base_lo, PCR_ext)
+			PCR.PCR_base_hi = PCR_base_hi
+			PCR.PCR_base_lo = PCR_base_lo
+			PCR.PCR_extension = PCR_ext
 	return [adaptation_field_length + 1, flags]
 
-def getPTS(filehandle, startPos):
+def getPTS(mm, startPos):
 	n = startPos
-	time1 = readFile(filehandle,n,1)
-	time2 = readFile(filehandle,n+1,2)
-	time3 = readFile(filehandle,n+3,2)
+	time1 = readFile(mm,n,1)
+	time2 = readFile(mm,n+1,2)
+	time3 = readFile(mm,n+3,2)
 	PTS_hi = (time1>>3)&0x1
 	PTS_low = ((time1>>1)&0x3)<<30
 	PTS_low += ((time2>>1)&0x7FFF)<<15
@@ -99,151 +114,148 @@ def getPTS(filehandle, startPos):
 
 	return PTS_hi, PTS_low
 
-def parseIndividualPESPayload(filehandle, startPos):
+def parseIndividualPESPayload(mm, startPos):
 
 	n = startPos
 
-##	  local1 = readFile(filehandle,n,4)
-##	  local2 = readFile(filehandle,n+4,4)
-##	  local3 = readFile(filehandle,n+8,4)
+##	  local1 = readFile(mm,n,4)
+##	  local2 = readFile(mm,n+4,4)
+##	  local3 = readFile(mm,n+8,4)
 ##	  print 'NAL header = 0x%08X%08X%08X' %(local1,local2,local3)
 
-	local = readFile(filehandle,n,4)
-	k = 0
-	while((local&0xFFFFFF00) != 0x00000100):
-		k += 1;
-		if (k > 100):
-			return "Unknown AU type"
-		local = readFile(filehandle,n+k,4)
-
-	if(((local&0xFFFFFF00) == 0x00000100)&(local&0x1F == 0x9)):
-		primary_pic_type = readFile(filehandle,n+k+4,1)
-		primary_pic_type = (primary_pic_type&0xE0)>>5
-		if (primary_pic_type == 0x0):
-			return "IDR_picture"
-		else:
-			return "non_IDR_picture"
+	# the start code may begin anywhere in the first 101 bytes
+	k = mm.find(b'\x00\x00\x01', n, n+103)
+	if (k < 0):
+		if (n+104 > len(mm)):
+			raise IOError
+		return "Unknown AU type"
 
-def parsePESHeader(filehandle, startPos,PESPktInfo):
+	try:
+		if ((mm[k+3]&0x1F) == 0x9):
+			primary_pic_type = (mm[k+4]&0xE0)>>5
+			if (primary_pic_type == 0x0):
+				return "IDR_picture"
+			else:
+				return "non_IDR_picture"
+	except IndexError:
+		raise IOError
+
+def parsePESHeader(mm, startPos,PESPktInfo):
 	n = startPos
-	stream_ID = readFile(filehandle, n+3, 1)
-	PES_packetLength = readFile(filehandle, n+4, 2)
-	PESPktInfo.setStreamID(stream_ID)
+	stream_ID = readFile(mm, n+3, 1)
+	PES_packetLength = readFile(mm, n+4, 2)
+	PESPktInfo.streamID = stream_ID
 
 	k = 6
 
-	if ((stream_ID != 0xBC)& \
-		(stream_ID != 0xBE)& \
-		(stream_ID != 0xF0)& \
-		(stream_ID != 0xF1)& \
-		(stream_ID != 0xFF)& \
-		(stream_ID != 0xF9)& \
-		(stream_ID != 0xF8)):
+	if (stream_ID not in NO_PES_HEADER_STREAM_IDS):
 
-		PES_packet_flags = readFile(filehandle, n+5, 4)
+		PES_packet_flags = readFile(mm, n+5, 4)
 		PTS_DTS_flag = ((PES_packet_flags>>14)&0x3)
 		PES_header_data_length = PES_packet_flags&0xFF
 
 		k += PES_header_data_length + 3
 
 		if (PTS_DTS_flag == 0x2):
-			(PTS_hi, PTS_low) = getPTS(filehandle, n+9)
+			(PTS_hi, PTS_low) = getPTS(mm, n+9)
 ##			  print 'PTS_hi = 0x%X, PTS_low = 0x%X' %(PTS_hi, PTS_low)
-			PESPktInfo.setPTS(PTS_hi, PTS_low)
+			PESPktInfo.PTS_hi = PTS_hi
+			PESPktInfo.PTS_lo = PTS_low
 
 		elif (PTS_DTS_flag == 0x3):
-			(PTS_hi, PTS_low) = getPTS(filehandle, n+9)
+			(PTS_hi, PTS_low) = getPTS(mm, n+9)
 ##			  print 'PTS_hi = 0x%X, PTS_low = 0x%X' %(PTS_hi, PTS_low)
-			PESPktInfo.setPTS(PTS_hi, PTS_low)
+			PESPktInfo.PTS_hi = PTS_hi
+			PESPktInfo.PTS_lo = PTS_low
 
-			(DTS_hi, DTS_low) = getPTS(filehandle, n+14)
+			(DTS_hi, DTS_low) = getPTS(mm, n+14)
 ##			  print 'DTS_hi = 0x%X, DTS_low = 0x%X' %(DTS_hi, DTS_low)
 		else:
 			k = k
 			return
 
-		auType = parseIndividualPESPayload(filehandle, n+k)
-		PESPktInfo.setAUType(auType)
+		auType = parseIndividualPESPayload(mm, n+k)
+		PESPktInfo.AUType = auType
 
-def parsePATSection(filehandle, k):
+def parsePATSection(mm, k, log=logging.info):
 
-	local = readFile(filehandle,k,4)
+	local = readFile(mm,k,4)
 	table_id = (local>>24)
 	if (table_id != 0x0):
-		logging.info('Ooops! error in parsePATSection()!')
+		log('Ooops! error in parsePATSection()!')
 		return
 
-	logging.info('------- PAT Information -------')
+	log('------- PAT Information -------')
 	section_length = (local>>8)&0xFFF
-	logging.info('section_length = %d' %section_length)
+	log('section_length = %d', section_length)
 
 	transport_stream_id = (local&0xFF) << 8;
-	local = readFile(filehandle, k+4, 4)
+	local = readFile(mm, k+4, 4)
 	transport_stream_id += (local>>24)&0xFF
 	transport_stream_id = (local >> 16)
 	version_number = (local>>17)&0x1F
 	current_next_indicator = (local>>16)&0x1
 	section_number = (local>>8)&0xFF
 	last_section_number = local&0xFF;
-	logging.info('section_number = %d, last_section_number = %d' %(section_number, last_section_number))
+	log('section_number = %d, last_section_number = %d', section_number, last_section_number)
 
 	length = section_length - 4 - 5
 	j = k + 8
 
 	while (length > 0):
-		local = readFile(filehandle, j, 4)
+		local = readFile(mm, j, 4)
 		program_number = (local >> 16)
 		program_map_PID = local & 0x1FFF
-		logging.info('program_number = 0x%X' %program_number)
+		log('program_number = 0x%X', program_number)
 		if (program_number == 0):
-			logging.info('network_PID = 0x%X' %program_map_PID)
+			log('network_PID = 0x%X', program_map_PID)
 		else:
-			logging.info('program_map_PID = 0x%X' %program_map_PID)
+			log('program_map_PID = 0x%X', program_map_PID)
 		length = length - 4;
 		j += 4
 		
-		logging.info('')
+		log('')
 
-def parsePMTSection(filehandle, k):
+def parsePMTSection(mm, k, log=logging.info):
 
-	local = readFile(filehandle,k,4)
+	local = readFile(mm,k,4)
 
 	table_id = (local>>24)
 	if (table_id != 0x2):
-		logging.info('Ooops! error in parsePATSection()!')
+		log('Ooops! error in parsePATSection()!')
 		return
 
-	logging.info('------- PMT Information -------')
+	log('------- PMT Information -------')
 
 	section_length = (local>>8)&0xFFF
-	logging.info('section_length = %d' %section_length)
+	log('section_length = %d', section_length)
 
 	program_number = (local&0xFF) << 8;
 
-	local = readFile(filehandle, k+4, 4)
+	local = readFile(mm, k+4, 4)
 
 	program_number += (local>>24)&0xFF
-	logging.info('program_number = %d' %program_number)
+	log('program_number = %d', program_number)
 
 	version_number = (local>>17)&0x1F
 	current_next_indicator = (local>>16)&0x1
 	section_number = (local>>8)&0xFF
 	last_section_number = local&0xFF;
-	logging.info('section_number = %d, last_section_number = %d' %(section_number, last_section_number))
+	log('section_number = %d, last_section_number = %d', section_number, last_section_number)
 
-	local = readFile(filehandle, k+8, 4)
+	local = readFile(mm, k+8, 4)
 
 	PCR_PID = (local>>16)&0x1FFF
-	logging.info('PCR_PID = 0x%X' %PCR_PID)
+	log('PCR_PID = 0x%X', PCR_PID)
 	program_info_length = (local&0xFFF)
-	logging.info('program_info_length = %d' %program_info_length)
+	log('program_info_length = %d', program_info_length)
 
 	n = program_info_length
 	m = k + 12;
 	while (n>0):
-		descriptor_tag = readFile(filehandle, m, 1)
-		descriptor_length = readFile(filehandle, m+1, 1)
-		logging.info('descriptor_tag = %d, descriptor_length = %d' %(descriptor_tag, descriptor_length))
+		descriptor_tag = mm[m]
+		descriptor_length = mm[m+1]
+		log('descriptor_tag = %d, descriptor_length = %d', descriptor_tag, descriptor_length)
 		n -= descriptor_length + 2
 		m += descriptor_length + 2
 
@@ -251,20 +263,20 @@ def parsePMTSection(filehandle, k):
 	length = section_length - 4 - 9 - program_info_length
 
 	while (length > 0):
-		local1 = readFile(filehandle, j, 1)
-		local2 = readFile(filehandle, j+1, 4)
+		local1 = readFile(mm, j, 1)
+		local2 = readFile(mm, j+1, 4)
 
 		stream_type = local1;
 		elementary_PID = (local2>>16)&0x1FFF
 		ES_info_length = local2&0xFFF
 
-		logging.info('stream_type = 0x%X, elementary_PID = 0x%X, ES_info_length = %d' %(stream_type, elementary_PID, ES_info_length))
+		log('stream_type = 0x%X, elementary_PID = 0x%X, ES_info_length = %d', stream_type, elementary_PID, ES_info_length)
 		n = ES_info_length
 		m = j+5;
 		while (n>0):
-			descriptor_tag = readFile(filehandle, m, 1)
-			descriptor_length = readFile(filehandle, m+1, 1)
-			logging.info('descriptor_tag = %d, descriptor_length = %d' %(descriptor_tag, descriptor_length))
+			descriptor_tag = mm[m]
+			descriptor_length = mm[m+1]
+			log('descriptor_tag = %d, descriptor_length = %d', descriptor_tag, descriptor_length)
 			n -= descriptor_length + 2
 			m += descriptor_length + 2
 
@@ -272,35 +284,35 @@ def parsePMTSection(filehandle, k):
 		j += 5 + ES_info_length
 		length -= 5 + ES_info_length
 
-	logging.info('')
+	log('')
 
-def parseSITSection(filehandle, k):
-	local = readFile(filehandle,k,4)
+def parseSITSection(mm, k, log=logging.info):
+	local = readFile(mm,k,4)
 
 	table_id = (local>>24)
 	if (table_id != 0x7F):
-		logging.info('Ooops! error in parseSITSection()!')
+		log('Ooops! error in parseSITSection()!')
 		return
 
-	logging.info('------- SIT Information -------')
+	log('------- SIT Information -------')
 
 	section_length = (local>>8)&0xFFF
-	logging.info('section_length = %d' %section_length)
-	local = readFile(filehandle, k+4, 4)
+	log('section_length = %d', section_length)
+	local = readFile(mm, k+4, 4)
 
 	section_number = (local>>8)&0xFF
 	last_section_number = local&0xFF;
-	logging.info('section_number = %d, last_section_number = %d' %(section_number, last_section_number))
-	local = readFile(filehandle, k+8, 2)
+	log('section_number = %d, last_section_number = %d', section_number, last_section_number)
+	local = readFile(mm, k+8, 2)
 	transmission_info_loop_length = local&0xFFF
-	logging.info('transmission_info_loop_length = %d' %transmission_info_loop_length)
+	log('transmission_info_loop_length = %d', transmission_info_loop_length)
 
 	n = transmission_info_loop_length
 	m = k + 10;
 	while (n>0):
-		descriptor_tag = readFile(filehandle, m, 1)
-		descriptor_length = readFile(filehandle, m+1, 1)
-		logging.info('descriptor_tag = %d, descriptor_length = %d' %(descriptor_tag, descriptor_length))
+		descriptor_tag = mm[m]
+		descriptor_length = mm[m+1]
+		log('descriptor_tag = %d, descriptor_length = %d', descriptor_tag, descriptor_length)
 		n -= descriptor_length + 2
 		m += descriptor_length + 2
 
@@ -308,23 +320,138 @@ def parseSITSection(filehandle, k):
 	length = section_length - 4 - 7 - transmission_info_loop_length
 
 	while (length > 0):
-		local1 = readFile(filehandle, j, 4)
+		local1 = readFile(mm, j, 4)
 		service_id = (local1>>16)&0xFFFF;
 		service_loop_length = local1&0xFFF
-		logging.info('service_id = %d, service_loop_length = %d' %(service_id, service_loop_length))
+		log('service_id = %d, service_loop_length = %d', service_id, service_loop_length)
 
 		n = service_loop_length
 		m = j+4;
 		while (n>0):
-			descriptor_tag = readFile(filehandle, m, 1)
-			descriptor_length = readFile(filehandle, m+1, 1)
-			logging.info('descriptor_tag = %d, descriptor_length = %d' %(descriptor_tag, descriptor_length))
+			descriptor_tag = mm[m]
+			descriptor_length = mm[m+1]
+			log('descriptor_tag = %d, descriptor_length = %d', descriptor_tag, descriptor_length)
 			n -= descriptor_length + 2
 			m += descriptor_length + 2
 
 		j += 4 + service_loop_length
 		length -= 4 + service_loop_length
-	logging.info('')
+	log('')
+
+def parsePSISection(parse, mm, k, sections):
+	"""Run the section parser *parse* on the section starting at *k*.
+
+	PAT/PMT/SIT sections repeat every few hundred milliseconds, so the
+	output of each distinct section is kept in *sections*, keyed by its raw
+	bytes, and replayed instead of decoding the same section again.
+	"""
+
+	try:
+		end = k + 3 + (((mm[k+1]&0x0F)<<8)|mm[k+2])
+	except IndexError:
+		raise IOError
+	key = mm[k:end]
+	lines = sections.get(key)
+	if lines is not None:
+		for args in lines:
+			logging.info(*args)
+		return
+
+	lines = []
+	def log(*args):
+		lines.append(args)
+		logging.info(*args)
+	parse(mm, k, log)
+	sections[key] = lines
+
+def scanPacketKernel(buf, n, packet_size, count, pid, pcr):
+	"""Single-pass form of the header scan in scanPacketCandidates, compiled
+	with Numba when it is installed."""
+
+	candidates = np.empty(count + 1, np.int64)
+	lastSame = np.empty(count + 1, np.int64)
+	found = 0
+	same = 0
+	for i in range(count):
+		p = n + i*packet_size
+		if buf[p] != PACKET_SYNC_BYTE:
+			count = i
+			break
+		b1 = buf[p+1]
+		b3 = buf[p+3]
+		payload = (b3 & 0x10) != 0
+		if (payload and (b1 & 0x40) != 0) or \
+			(pcr and (b3 & 0x20) != 0 and buf[p+4] > 0 and (buf[p+5] & 0x10) != 0):
+			candidates[found] = i
+			lastSame[found] = same
+			found += 1
+		if payload and ((b1 & 0x1F)*256 + buf[p+2]) == pid:
+			same = i
+	candidates[found] = count
+	lastSame[found] = same
+	return candidates[:found+1], lastSame[:found+1]
+
+if numba is not None:
+	scanPacketKernel = numba.njit(cache=True)(scanPacketKernel)
+
+def scanPacketCandidates(mm, n, packet_size, pid, searchItem):
+	"""Vectorised pre-scan of the TS headers in *mm* with NumPy, or with a
+	compiled single-pass kernel when Numba is installed.
+
+	Returns (candidates, lastSame): the packet numbers the per-packet loop
+	has to visit, ending with the packet number where the byte-wise scan
+	takes over, and for each of them the last earlier packet of *pid* that
+	carried a payload. Returns None when NumPy is not available.
+	"""
+
+	if np is None:
+		return None
+
+	# leave the last packets to the byte-wise loop so that reads running
+	# past the end of the file are reported exactly as before
+	count = min((len(mm) - n) // packet_size - 2, MAX_PACKET_COUNT + 1)
+	if count <= 0:
+		return None
+
+	buf = np.frombuffer(mm, dtype=np.uint8)
+	if numba is not None:
+		candidates, lastSame = scanPacketKernel(buf, n, packet_size, count, pid,
+			searchItem == "PCR")
+		return candidates.tolist(), lastSame.tolist()
+
+	end = n + count*packet_size
+	b0 = buf[n:end:packet_size]
+	b1 = buf[n+1:end:packet_size]
+	b2 = buf[n+2:end:packet_size]
+	b3 = buf[n+3:end:packet_size]
+
+	# stop the fast path at the first lost sync, the loop reports it
+	lost = np.flatnonzero(b0 != PACKET_SYNC_BYTE)
+	if lost.size:
+		count = int(lost[0])
+		b1 = b1[:count]
+		b2 = b2[:count]
+		b3 = b3[:count]
+
+	pids = ((b1 & 0x1F).astype(np.uint16) << 8) | b2
+	payload = (b3 & 0x10) != 0
+	same = pids == pid
+	same &= payload
+	wanted = ((b1 & 0x40) != 0) & payload
+	if searchItem == "PCR":
+		b4 = buf[n+4:end:packet_size][:count]
+		b5 = buf[n+5:end:packet_size][:count]
+		wanted |= ((b3 & 0x20) != 0) & (b4 > 0) & ((b5 & 0x10) != 0)
+
+	candidates = np.append(np.flatnonzero(wanted), count)
+	same = np.flatnonzero(same)
+	if same.size:
+		i = np.searchsorted(same, candidates)
+		lastSame = np.where(i > 0, same[i - 1], 0)
+	else:
+		lastSame = np.zeros_like(candidates)
+
+	return candidates.tolist(), lastSame.tolist()
 
 def parseTSMain(filehandle, packet_size, mode, pid, psi_mode, searchItem):
 	"""Parse a transport stream and log information about its packets.
@@ -340,6 +467,22 @@ def parseTSMain(filehandle, packet_size, mode, pid, psi_mode, searchItem):
 	PCR = SystemClock()
 	PESPktInfo = PESPacketInfo()
 
+	# regular files are mapped; pipes and devices can neither be mapped nor
+	# seeked, so they are parsed from a window refilled READ_CHUNK at a time
+	refill = None
+	if stat.S_ISREG(os.fstat(filehandle.fileno()).st_mode):
+		try:
+			mm = mmap.mmap(filehandle.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:
+			logging.info('Ooops! file is empty')
+			return
+	else:
+		refill = filehandle.read
+		mm = refill(READ_CHUNK)
+		if not mm:
+			logging.info('Ooops! file is empty')
+			return
+
 	if (packet_size != 192):
 		n = 0
 	else:
@@ -351,151 +494,179 @@ def parseTSMain(filehandle, packet_size, mode, pid, psi_mode, searchItem):
 	EntryPESPacketNumList = []
 	TPIList = []
 	PTSList = []
-	PIDList = []
+	# one bit per 13-bit PID
+	PIDSeen = bytearray(1 << 10)
+	PSISections = {}
 
 	idr_flag = False
 	last_SameES_packetNo = 0
 	last_EntryTPI = 0
 
+	# bind globals and bound methods used per packet to locals
+	_info = logging.info
+	_log_enabled = logging.getLogger().isEnabledFor(logging.INFO)
+	pcr_search = (searchItem == "PCR")
+	_read = readFile
+	_hdr = _HDR
+	parse_af = parseAdaptation_Field
+	parse_pes = parsePESHeader
+	entry_append = EntryPESPacketNumList.append
+	tpi_append = TPIList.append
+	pts_append = PTSList.append
+
+	# with NumPy, jump straight between the packets that need decoding
+	n0 = n
+	scan = None
+	if refill is None:
+		scan = scanPacketCandidates(mm, n0, packet_size, pid, searchItem)
+	if scan is not None:
+		scan_end = scan[0][-1]
+		scan = zip(*scan)
+
 	try:
 		while(True):
 
+			if scan is not None:
+				packetCount, last_SameES_packetNo = next(scan)
+				if (packetCount == scan_end):
+					scan = None
+				n = n0 + packetCount*packet_size
+				if (packetCount > MAX_PACKET_COUNT):
+					break
+
+			# slide the window at a packet boundary, keeping enough bytes
+			# for any section or PES header starting in this packet
+			elif refill is not None and (len(mm) - n < READ_AHEAD):
+				more = refill(READ_CHUNK)
+				if more:
+					mm = mm[n:] + more
+					n = 0
+				else:
+					refill = None
+
 			##if (rdi_count == 0):
 				##packetCount += 1
 				##rdi_count += 1
 
-			PacketHeader = readFile(filehandle,n,4)
+			# one unpack for the whole 4-byte header, then bitfield decode
+			PacketHeader = _hdr(mm, n)[0]
+			syncByte = PacketHeader>>24
+			payload_unit_start_indicator = (PacketHeader>>22)&0x1
+			PID = (PacketHeader>>8)&0x1FFF
+			adaptation_fieldc_trl = (PacketHeader>>4)&0x3
 
-			syncByte = (PacketHeader>>24)
 			if (syncByte != 0x47):
-				logging.info('Ooops! Can NOT found Sync_Byte! maybe something wrong with the file')
+				_info('Ooops! Can NOT found Sync_Byte! maybe something wrong with the file')
 				break
 
-			payload_unit_start_indicator = (PacketHeader>>22)&0x1
-
-			PID = ((PacketHeader>>8)&0x1FFF)
-##			  if (PID == 0x0):
-##				  print 'Found PAT Packet! packet No. %d' %packetCount
-##				  print 'payload_unit_start_indicator = %d' %payload_unit_start_indicator
-
-
-			adaptation_fieldc_trl = ((PacketHeader>>4)&0x3)
 			Adaptation_Field_Length = 0
 
-			if (adaptation_fieldc_trl == 0x2)|(adaptation_fieldc_trl == 0x3):
-				[Adaptation_Field_Length, flags] = parseAdaptation_Field(filehandle,n+4,PCR)
+			if (adaptation_fieldc_trl & 0x2) and not pcr_search:
+				# only the length is needed to find the payload
+				Adaptation_Field_Length = mm[n+4] + 1
+
+			elif (adaptation_fieldc_trl & 0x2):
+				[Adaptation_Field_Length, flags] = parse_af(mm,n+4,PCR)
 			
-				if ((searchItem == "PCR")&((flags>>4)&0x1)):
+				if ((flags>>4)&0x1):
 					discontinuity = 'discontinuity: false'
 					if (((flags>>7)&0x1)):
 						discontinuity = 'discontinuity: true'
 
-					logging.info('PCR packet, packet No. %d, PID = 0x%x, PCR_base = hi:0x%X lo:0x%X PCR_ext = 0x%X %s' \
-					%(packetCount, PID, PCR.PCR_base_hi, PCR.PCR_base_lo, PCR.PCR_extension, discontinuity))
+					_info('PCR packet, packet No. %d, PID = 0x%x, PCR_base = hi:0x%X lo:0x%X PCR_ext = 0x%X %s',
+					packetCount, PID, PCR.PCR_base_hi, PCR.PCR_base_lo, PCR.PCR_extension, discontinuity)
 
-			if (adaptation_fieldc_trl == 0x1)|(adaptation_fieldc_trl == 0x3):
+			if (adaptation_fieldc_trl & 0x1):
 
-				PESstartCode = readFile(filehandle,n+Adaptation_Field_Length+4,4)
+				# only the first packet of a PES packet or PSI section has a
+				# start code or pointer_field worth reading
+				if payload_unit_start_indicator:
 
-				if ((PESstartCode&0xFFFFFF00) == 0x00000100)& \
-					(PID == pid)&(payload_unit_start_indicator == 1):
+					payload = n+Adaptation_Field_Length+4
+					PESstartCode = _read(mm,payload,4)
+					isPESstart = ((PESstartCode&0xFFFFFF00) == 0x00000100)
 
-					parsePESHeader(filehandle, n+Adaptation_Field_Length+4, PESPktInfo)
-					PTS_MSB24 = ((PESPktInfo.PTS_hi&0x1)<<23)|((PESPktInfo.PTS_lo>>9)&0x7FFFFF)
-					logging.info('PES start, packet No. %d, PID = 0x%x, PTS_MSB24 = 0x%x PTS_hi = 0x%X, PTS_low = 0x%X' \
-					%(packetCount, PID, PTS_MSB24, PESPktInfo.PTS_hi, PESPktInfo.PTS_lo))
+					if isPESstart and (PID == pid):
 
-					if (mode == 'ES'):
-						logging.info('packet No. %d,	ES PID = 0x%X,	Steam_ID = 0x%X,  AU_Type = %s' \
-						%(packetCount, PID, PESPktInfo.getStreamID(), PESPktInfo.getAUType()))
+						parse_pes(mm, payload, PESPktInfo)
+						PTS_MSB24 = ((PESPktInfo.PTS_hi&0x1)<<23)|((PESPktInfo.PTS_lo>>9)&0x7FFFFF)
+						if _log_enabled:
+							_info('PES start, packet No. %d, PID = 0x%x, PTS_MSB24 = 0x%x PTS_hi = 0x%X, PTS_low = 0x%X',
+							packetCount, PID, PTS_MSB24, PESPktInfo.PTS_hi, PESPktInfo.PTS_lo)
 
-						if (idr_flag == True):
-							EntryPESPacketNumList.append(last_SameES_packetNo - last_EntryTPI +1)
-							logging.info('packet No. %d, ES PID = 0x%X, Steam_ID = 0x%X, AU_Type = %s' \
-							%(packetCount, PID, PESPktInfo.getStreamID(), PESPktInfo.getAUType()))
+						if (mode == 'ES'):
+							if _log_enabled:
+								_info('packet No. %d,	ES PID = 0x%X,	Steam_ID = 0x%X,  AU_Type = %s',
+								packetCount, PID, PESPktInfo.streamID, PESPktInfo.AUType)
 
+							if (idr_flag == True):
+								entry_append(last_SameES_packetNo - last_EntryTPI +1)
+								_info('packet No. %d, ES PID = 0x%X, Steam_ID = 0x%X, AU_Type = %s',
+								packetCount, PID, PESPktInfo.streamID, PESPktInfo.AUType)
 
-						if (PESPktInfo.getAUType() == "IDR_picture"):
-							idr_flag = True
-							last_EntryTPI = packetCount
-							logging.info('packet No. %d, ES PID = 0x%X, Steam_ID = 0x%X, AU_Type = %s' \
-							%(packetCount, PID, PESPktInfo.getStreamID(), PESPktInfo.getAUType()))
-							TPIList.append(packetCount)
-							PTSList.append(PTS_MSB24)
-						else:
-							idr_flag = False
 
-				elif (((PESstartCode&0xFFFFFF00) != 0x00000100)& \
-					(payload_unit_start_indicator == 1)):
+							if (PESPktInfo.AUType == "IDR_picture"):
+								idr_flag = True
+								last_EntryTPI = packetCount
+								_info('packet No. %d, ES PID = 0x%X, Steam_ID = 0x%X, AU_Type = %s',
+								packetCount, PID, PESPktInfo.streamID, PESPktInfo.AUType)
+								tpi_append(packetCount)
+								pts_append(PTS_MSB24)
+							else:
+								idr_flag = False
 
-					pointer_field = (PESstartCode >> 24)
-					table_id = readFile(filehandle,n+Adaptation_Field_Length+4+1+pointer_field,1)
+					elif not isPESstart:
 
-					if ((table_id == 0x0)&(PID != 0x0)):
-						logging.info('Ooops!, Something wrong in packet No. %d' %packetCount)
+						pointer_field = (PESstartCode >> 24)
+						k = payload+1+pointer_field
+						table_id = mm[k]
 
-					k = n+Adaptation_Field_Length+4+1+pointer_field
+						if (table_id == 0x0) and (PID != 0x0):
+							_info('Ooops!, Something wrong in packet No. %d', packetCount)
 
-					if (table_id == 0x0):
+						if (table_id == 0x0):
 ##						packetCount -= 1
 ##						rdi_count -= 1
-						if (((searchItem == "FFF")&(mode == 'PAT'))|(searchItem == "PAT")):
-							if ((psi_mode == 2)&(searchItem == "PAT")):
-								isUnique = True
-								for i in PIDList:
-									if (i == PID):
-										isUnique = False
-								
-								if isUnique:
-									PIDList.append(PID)
-								else:
-									n += packet_size
-									packetCount += 1
-								continue
-								
-							logging.info('pasing PAT Packet! packet No. %d, PID = 0x%X' %(packetCount, PID),parsePATSection(filehandle, k))
-							if (psi_mode == 0):
-								return
-
-
-					elif (table_id == 0x2):
+							if (searchItem == "PAT") or ((searchItem == "FFF") and (mode == 'PAT')):
+								if (psi_mode == 2) and (searchItem == "PAT"):
+									if PIDSeen[PID>>3] & (1<<(PID&7)):
+										n += packet_size
+										packetCount += 1
+										continue
+									PIDSeen[PID>>3] |= 1<<(PID&7)
+								_info('parsing PAT Packet! packet No. %d, PID = 0x%X', packetCount, PID)
+								parsePSISection(parsePATSection, mm, k, PSISections)
+								if (psi_mode == 0):
+									return
+
+
+						elif (table_id == 0x2):
 ##						  packetCount -= 1
 ##						  rdi_count -= 1
-						if (((searchItem == "FFF")&(mode == 'PMT')&(PID == pid))|(searchItem == "PMT")):
-							if ((psi_mode == 2)&(searchItem == "PMT")):
-								isUnique = True
-								for i in PIDList:
-									if (i == PID):
-										isUnique = False
-								
-								if isUnique:
-									PIDList.append(PID)
-								else:
-									n += packet_size
-									packetCount += 1
-									continue
-							logging.info('pasing PMT Packet! packet No. %d, PID = 0x%X' %(packetCount, PID),\
-							parsePMTSection(filehandle, k))
-							if (psi_mode == 0):
-								return
+							if (searchItem == "PMT") or ((searchItem == "FFF") and (mode == 'PMT') and (PID == pid)):
+								if (psi_mode == 2) and (searchItem == "PMT"):
+									if PIDSeen[PID>>3] & (1<<(PID&7)):
+										n += packet_size
+										packetCount += 1
+										continue
+									PIDSeen[PID>>3] |= 1<<(PID&7)
+								_info('parsing PMT Packet! packet No. %d, PID = 0x%X', packetCount, PID)
+								parsePSISection(parsePMTSection, mm, k, PSISections)
+								if (psi_mode == 0):
+									return
 					
-					elif (table_id == 0x7F):
-						if (((searchItem == "FFF")&(mode == 'SIT')&(PID == pid))|(searchItem == "SIT")):
-							if ((psi_mode == 2)&(searchItem == "SIT")):
-								isUnique = True
-								for i in PIDList:
-									if (i == PID):
-										isUnique = False
-								if isUnique:
-									PIDList.append(PID)
-								else:
-									n += packet_size
-									packetCount += 1
-									continue
-							logging.info('pasing SIT Packet! packet No. %d, PID = 0x%X' %(packetCount, PID),\
-							parseSITSection(filehandle, k))
-							if (psi_mode == 0):
-								return
+						elif (table_id == 0x7F):
+							if (searchItem == "SIT") or ((searchItem == "FFF") and (mode == 'SIT') and (PID == pid)):
+								if (psi_mode == 2) and (searchItem == "SIT"):
+									if PIDSeen[PID>>3] & (1<<(PID&7)):
+										n += packet_size
+										packetCount += 1
+										continue
+									PIDSeen[PID>>3] |= 1<<(PID&7)
+								_info('parsing SIT Packet! packet No. %d, PID = 0x%X', packetCount, PID)
+								parsePSISection(parseSITSection, mm, k, PSISections)
+								if (psi_mode == 0):
+									return
 ##					  else:
 ##						  print 'Unknown PSI, table_id = 0x%X' %table_id
 
@@ -519,21 +690,27 @@ def parseTSMain(filehandle, packet_size, mode, pid, psi_mode, searchItem):
 			if (packetCount > 1450000):
 				break
 
-	except IOError:
+	except (IOError, IndexError, struct.error):
 		logging.info('IO error! maybe reached EOF')
 	else:
 		filehandle.close()
+	finally:
+		if isinstance(mm, mmap.mmap):
+			mm.close()
 
 	logging.info('================================================\n')
 	for i in range(len(EntryPESPacketNumList)):
-			logging.info('TPI = 0x%x, PTS = 0x%x, EntryPESPacketNum = 0x%x' %(TPIList[i], PTSList[i], EntryPESPacketNumList[i]))
+			logging.info('TPI = 0x%x, PTS = 0x%x, EntryPESPacketNum = 0x%x', TPIList[i], PTSList[i], EntryPESPacketNumList[i])
 
 
 def getFilename():
-	root = tk()
+	# Tk is only needed for the file dialog, so import it here
+	from tkinter import Tk, filedialog
+
+	root = Tk()
 	fTyp=[('.ts File','*.ts'),('.TOD File','*.TOD'),('.trp File','*.trp'),('All Files','*.*')]
 	iDir='~/'
-	filename=tkFileDialog.askopenfilename(filetypes=fTyp,initialdir=iDir)
+	filename=filedialog.askopenfilename(filetypes=fTyp,initialdir=iDir)
 	root.destroy()
 	return filename;
 
@@ -587,7 +764,7 @@ def Main():
                 return
 
         logging.info(filename)
-        with open(filename, 'rb') as filehandle:
+        with open(filename, 'rb', buffering=1<<17) as filehandle:
                 parseTSMain(filehandle, opts.packet_size, opts.mode, pid, psi_mode, opts.searchItem)
 
 
@@ -15,13 +15,18 @@ batch processing ergonomics that the Bash version provided.
 from __future__ import annotations
 
 import argparse
+import atexit
 import concurrent.futures
 import dataclasses
+import errno
+import functools
 import json
 import os
+import queue
 import re
 import shlex
 import shutil
+import stat
 import subprocess
 import sys
 import tempfile
@@ -29,7 +34,15 @@ import textwrap
 import threading
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:  # optional, noticeably faster parser for large ffprobe payloads
+    import orjson
+except ImportError:  # pragma: no cover - fall back to the standard library
+    orjson = None
+
+# Both parsers accept bytes, so ffprobe output is never decoded to str first.
+_json_loads: Callable[[Union[bytes, str]], Any] = orjson.loads if orjson is not None else json.loads
 
 # ---------------------------------------------------------------------------
 # Logging helpers
@@ -57,33 +70,58 @@ def _colorize(message: str, colour: Optional[str]) -> str:
 
 
 class Logger:
-    """Simple colour aware logger used throughout the module."""
+    """Simple colour aware logger used throughout the module.
+
+    Messages are handed to a single writer thread through a queue, so encode
+    workers never wait on each other (or on a slow terminal) to log.  Call
+    :meth:`flush` before anything else writes to the same terminal.
+    """
 
     def __init__(self, verbose: bool = False) -> None:
         self.verbose = verbose
-        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[Tuple[Optional[str], Any]]" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._drain, name="av1conv-log", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _drain(self) -> None:
+        while True:
+            text, target = self._queue.get()
+            if text is None:
+                target.set()
+                continue
+            try:
+                target.write(text)
+                target.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _emit(self, message: str, colour: Optional[str], stream: Any = None) -> None:
+        self._queue.put((_colorize(message, colour) + "\n", stream or sys.stdout))
+
+    def flush(self) -> None:
+        """Block until every message queued so far has been written."""
+
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait()
 
     def info(self, message: str, colour: Optional[str] = None, *, always: bool = False) -> None:
         if not always and not self.verbose:
             return
-        with self._lock:
-            print(_colorize(message, colour))
+        self._emit(message, colour)
 
     def notice(self, message: str) -> None:
-        with self._lock:
-            print(_colorize(message, "blue"))
+        self._emit(message, "blue")
 
     def success(self, message: str) -> None:
-        with self._lock:
-            print(_colorize(message, "green"))
+        self._emit(message, "green")
 
     def warning(self, message: str) -> None:
-        with self._lock:
-            print(_colorize(message, "yellow"))
+        self._emit(message, "yellow")
 
     def error(self, message: str) -> None:
-        with self._lock:
-            print(_colorize(message, "red"), file=sys.stderr)
+        self._emit(message, "red", sys.stderr)
 
 
 # ---------------------------------------------------------------------------
@@ -91,19 +129,51 @@ class Logger:
 # ---------------------------------------------------------------------------
 
 
+_SIZE_RE = re.compile(r"(\d+)([kKmMgGtT]?)")
+_SIZE_MULTIPLIERS = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
 def _size_to_bytes(value: str) -> int:
     """Convert size strings such as ``1G`` into integer bytes."""
 
-    multipliers = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
     value = value.strip()
-    match = re.fullmatch(r"(\d+)([kKmMgGtT]?)", value)
+    match = _SIZE_RE.fullmatch(value)
     if not match:
         raise ValueError(f"Invalid size value: {value}")
     number, suffix = match.groups()
-    multiplier = multipliers.get(suffix.lower(), 1)
+    multiplier = _SIZE_MULTIPLIERS.get(suffix.lower(), 1)
     return int(number) * multiplier
 
 
+_SVT_OPTIONS = (
+    ("-svtav1-tune", "svt_tune"),
+    ("-svtav1-enable-overlays", "svt_enable_overlays"),
+    ("-svtav1-fast-decode", "svt_fast_decode"),
+    ("-svtav1-lookahead", "svt_lookahead"),
+    ("-svtav1-enable-qm", "svt_enable_qm"),
+    ("-svtav1-qm-min", "svt_qm_min"),
+    ("-svtav1-qm-max", "svt_qm_max"),
+    ("-svtav1-tile-columns", "svt_tile_columns"),
+    ("-svtav1-aq-mode", "svt_aq_mode"),
+    ("-svtav1-sharpness", "svt_sharpness"),
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _build_svt_args(values: Tuple[Any, ...]) -> Tuple[str, ...]:
+    args: List[str] = []
+    for (option, _), value in zip(_SVT_OPTIONS, values):
+        args += (option, str(value))
+    return tuple(args)
+
+
+@functools.lru_cache(maxsize=8)
+def _compile_ignore_terms(terms: Tuple[str, ...]) -> Optional["re.Pattern[str]"]:
+    if not terms:
+        return None
+    return re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+
+
 @dataclass
 class Config:
     """Runtime configuration options for the converter."""
@@ -155,6 +225,8 @@ class Config:
     crf_film: int = 22
     crf_tv: int = 26
     resize_heuristic: str = "downscale"  # placeholder for documentation
+    probe_cache: bool = True
+    auto_threads: bool = False
 
     def as_dict(self) -> Dict[str, Any]:
         return dataclasses.asdict(self)
@@ -163,6 +235,18 @@ class Config:
     def size_threshold_bytes(self) -> int:
         return _size_to_bytes(self.size_threshold)
 
+    @property
+    def svt_args(self) -> Tuple[str, ...]:
+        """The fixed ``-svtav1-*`` options, built once per distinct setting."""
+
+        return _build_svt_args(tuple(getattr(self, attr) for _, attr in _SVT_OPTIONS))
+
+    @property
+    def ignore_pattern(self) -> Optional["re.Pattern[str]"]:
+        """Single case-insensitive pattern matching any ignore term."""
+
+        return _compile_ignore_terms(tuple(self.ignore_terms or ()) + tuple(self.extra_ignore_terms or ()))
+
     def content_type_crf(self, content_type: str) -> int:
         mapping = {
             "animation": self.crf_animation,
@@ -233,6 +317,8 @@ _SAMPLE_CONFIG = textwrap.dedent(
     crf_animation=29
     crf_film=22
     crf_tv=26
+    probe_cache=true
+    auto_threads=false
     # Additional values may be added in future releases. Unknown keys are
     # ignored with a warning when encountered.
     """
@@ -247,15 +333,33 @@ def _parse_bool(value: str) -> bool:
     return value.lower() in {"1", "true", "yes", "on"}
 
 
+def _parse_terms(value: str) -> Tuple[str, ...]:
+    return tuple(p.strip() for p in value.split(",") if p.strip())
+
+
+def _coercer_for(default: Any) -> Callable[[str], Any]:
+    """Return the parser for a config value whose default is *default*."""
+
+    if isinstance(default, bool):
+        return _parse_bool
+    if isinstance(default, int):
+        return int
+    if isinstance(default, Path):
+        return Path
+    if isinstance(default, tuple):
+        return _parse_terms
+    return str
+
+
 def load_config_file(path: Path, config: Config, logger: Logger) -> None:
     """Load overrides from a simple ``key=value`` configuration file."""
 
     if not path.exists():
         raise FileNotFoundError(path)
 
-    key_types: Dict[str, Tuple[str, Any]] = {}
-    for field_ in dataclasses.fields(config):
-        key_types[field_.name] = (field_.type, getattr(config, field_.name))
+    coercers: Dict[str, Callable[[str], Any]] = {
+        field_.name: _coercer_for(getattr(config, field_.name)) for field_ in dataclasses.fields(config)
+    }
 
     for raw_line in path.read_text(encoding="utf-8").splitlines():
         line = raw_line.strip()
@@ -267,25 +371,15 @@ def load_config_file(path: Path, config: Config, logger: Logger) -> None:
         key, value = line.split("=", 1)
         key = key.strip()
         value = value.strip()
-        if key not in key_types:
+        coerce = coercers.get(key)
+        if coerce is None:
             logger.warning(f"Ignoring unknown configuration key: {key}")
             continue
         if value == "":
             setattr(config, key, None)
             continue
-        current = getattr(config, key)
         try:
-            if isinstance(current, bool):
-                setattr(config, key, _parse_bool(value))
-            elif isinstance(current, int):
-                setattr(config, key, int(value))
-            elif isinstance(current, Path):
-                setattr(config, key, Path(value))
-            elif isinstance(current, tuple):
-                parts = [p.strip() for p in value.split(",") if p.strip()]
-                setattr(config, key, tuple(parts))
-            else:
-                setattr(config, key, value)
+            setattr(config, key, coerce(value))
         except Exception as exc:  # pragma: no cover - defensive
             logger.warning(f"Failed to parse config value for {key}: {exc}")
 
@@ -330,6 +424,9 @@ def build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument("--preferred-subtitle-language", dest="preferred_subtitle_language", help="Preferred subtitle language (3 letter code)")
     parser.add_argument("--include-forced-subs", dest="forced_subtitles_only", action="store_false", help="Include all subtitles instead of forced-only")
     parser.add_argument("--generate-report", action="store_true", help="Print JSON summary of the encode session")
+    parser.add_argument("--ffmpeg-threads-per-invocation", type=int, dest="ffmpeg_threads", help="FFmpeg threads per encode (default: CPUs / parallel jobs when -J > 1)")
+    parser.add_argument("--auto-threads", dest="auto_threads", action="store_true", default=None, help="Pick parallel jobs and FFmpeg threads per job from the available CPUs")
+    parser.add_argument("--no-probe-cache", dest="probe_cache", action="store_false", default=None, help="Always run ffprobe instead of reusing cached results")
 
     return parser
 
@@ -358,6 +455,57 @@ def apply_args_to_config(args: argparse.Namespace, config: Config) -> None:
         config.force = True
 
 
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def auto_tune_parallelism(config: Config, logger: Logger) -> None:
+    """Split the available CPUs between parallel encodes and FFmpeg threads.
+
+    SVT-AV1 scales well up to roughly six to eight threads per encode, so on
+    larger machines several narrower encodes finish a batch sooner than one
+    wide one.  An explicit ``-J`` greater than one is respected, but capped so
+    that every job keeps at least four threads.
+    """
+
+    cpus = _available_cpus()
+    jobs = config.max_parallel_jobs if config.max_parallel_jobs > 1 else cpus // 6
+    jobs = max(1, min(jobs, cpus // 4))
+    config.max_parallel_jobs = jobs
+    config.ffmpeg_threads = max(4, cpus // jobs)
+    logger.info(
+        f"Auto threads: {cpus} CPUs -> {jobs} parallel job(s) x {config.ffmpeg_threads} FFmpeg threads",
+        "cyan",
+        always=True,
+    )
+
+
+def limit_threads_per_job(config: Config, logger: Logger) -> None:
+    """Keep parallel encodes from asking for more threads than there are CPUs.
+
+    Every encode runs its own FFmpeg with ``ffmpeg_threads`` threads, so
+    ``-J`` jobs at the configured width can oversubscribe the machine and
+    spend their time context switching.  In that case each job gets an even
+    share of the CPUs instead.
+    """
+
+    jobs = config.max_parallel_jobs
+    if jobs <= 1:
+        return
+    cpus = _available_cpus()
+    if jobs * config.ffmpeg_threads <= cpus:
+        return
+    config.ffmpeg_threads = max(1, cpus // jobs)
+    logger.info(
+        f"{jobs} parallel job(s) on {cpus} CPUs: using {config.ffmpeg_threads} FFmpeg thread(s) per job",
+        "cyan",
+        always=True,
+    )
+
+
 # ---------------------------------------------------------------------------
 # FFmpeg discovery and probing
 # ---------------------------------------------------------------------------
@@ -372,18 +520,38 @@ class FFmpegToolchain:
     supports_aac: bool
 
 
-def _check_encoder(binary: Path, encoder: str) -> bool:
+# Every descriptor this process opens is non-inheritable (PEP 446), so asking
+# subprocess to close the rest buys nothing; leaving close_fds off lets CPython
+# launch through posix_spawn/vfork instead of fork + an fd sweep, which is
+# what dominates the cost of the many short ffprobe calls.
+_SPAWN_KWARGS: Dict[str, Any] = {"close_fds": False}
+
+
+@functools.lru_cache(maxsize=None)
+def _list_encoders(binary: Path) -> FrozenSet[str]:
+    """Return the encoder names reported by ``ffmpeg -encoders``.
+
+    The listing is fetched once per binary; every capability check after
+    that is a set lookup instead of another FFmpeg launch.
+    """
+
     try:
         out = subprocess.run(
             [str(binary), "-hide_banner", "-encoders"],
             check=True,
             text=True,
             capture_output=True,
+            **_SPAWN_KWARGS,
         )
     except (OSError, subprocess.CalledProcessError):
-        return False
-    pattern = re.compile(rf"\b{re.escape(encoder)}\b", re.IGNORECASE)
-    return bool(pattern.search(out.stdout))
+        return frozenset()
+    encoders = set()
+    for line in out.stdout.splitlines():
+        parts = line.split()
+        # Entries look like " V....D libsvtav1   SVT-AV1(...)"
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[1] != "=":
+            encoders.add(parts[1])
+    return frozenset(encoders)
 
 
 def find_ffmpeg(config: Config, logger: Logger) -> FFmpegToolchain:
@@ -411,7 +579,7 @@ def find_ffmpeg(config: Config, logger: Logger) -> FFmpegToolchain:
             logger.info(f"Skipping non executable candidate {candidate}", always=True)
             continue
         try:
-            result = subprocess.run([str(candidate), "-version"], capture_output=True, text=True, check=True)
+            result = subprocess.run([str(candidate), "-version"], capture_output=True, text=True, check=True, **_SPAWN_KWARGS)
         except (OSError, subprocess.CalledProcessError):
             logger.warning(f"Failed to run FFmpeg candidate {candidate}")
             continue
@@ -421,11 +589,12 @@ def find_ffmpeg(config: Config, logger: Logger) -> FFmpegToolchain:
             ffprobe_path = Path(shutil.which("ffprobe") or ffprobe_path)
         if not ffprobe_path or not ffprobe_path.exists():
             raise RuntimeError("Could not locate ffprobe for the chosen FFmpeg")
-        has_svt = _check_encoder(candidate, "libsvtav1")
+        encoders = _list_encoders(candidate)
+        has_svt = "libsvtav1" in encoders
         if not has_svt:
             raise RuntimeError("Selected FFmpeg build does not include libsvtav1 encoder")
-        supports_libopus = _check_encoder(candidate, "libopus")
-        supports_aac = _check_encoder(candidate, "aac") or _check_encoder(candidate, "libfdk_aac")
+        supports_libopus = "libopus" in encoders
+        supports_aac = "aac" in encoders or "libfdk_aac" in encoders
         return FFmpegToolchain(candidate, ffprobe_path, has_svt, supports_libopus, supports_aac)
 
     raise RuntimeError("No suitable FFmpeg installation found")
@@ -456,6 +625,8 @@ class StreamInfo:
     color_primaries: Optional[str] = None
     color_range: Optional[str] = None
     side_data_list: List[Dict[str, Any]] = field(default_factory=list)
+    master_display: Optional[str] = None
+    content_light: Optional[str] = None
 
 
 @dataclass
@@ -467,8 +638,9 @@ class MediaInfo:
     subtitle_streams: List[StreamInfo]
     duration: float
     size_bytes: int
+    header_probe_complete: bool = True
 
-    @property
+    @functools.cached_property
     def is_hdr(self) -> bool:
         transfer = (self.video.color_transfer or "").lower()
         if transfer in {"smpte2084", "arib-std-b67", "iec61966-2-4"}:
@@ -479,39 +651,177 @@ class MediaInfo:
                 return True
         return False
 
-    @property
+    @functools.cached_property
     def has_dolby_vision(self) -> bool:
         for data in self.video.side_data_list:
-            if data.get("side_data_type", "").lower().startswith("dolby vision"):
+            if data.get("side_data_type", "").lower().startswith("dolby vision") or data.get("dv_profile"):
                 return True
-        profile = None
-        for data in self.video.side_data_list:
-            if "dv_profile" in data:
-                profile = data.get("dv_profile")
-        if profile:
-            return True
         # Some Dolby Vision streams expose codec_tag string "dvh1" or "dvhe"
         codec_tag_string = (self.video.tags or {}).get("codec_tag_string", "").lower()
         if codec_tag_string.startswith("dv"):
             return True
         return False
 
+    # Heuristic results are pure functions of the probe data, so they are
+    # computed once per file even if a plan is built more than once.
+    @functools.cached_property
+    def content_type(self) -> str:
+        return detect_content_type(self)
 
-def ffprobe_media(path: Path, toolchain: FFmpegToolchain) -> MediaInfo:
-    command = [
-        str(toolchain.ffprobe),
-        "-hide_banner",
+    @functools.cached_property
+    def grain_level(self) -> int:
+        return estimate_grain_level(self)
+
+
+def _default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "av1conv"
+
+
+class ProbeCache:
+    """Persistent store of raw ffprobe output keyed by file identity.
+
+    Entries are keyed by the absolute path and only reused while the file's
+    ``st_mtime_ns`` and ``st_size`` are unchanged, so repeated runs over a
+    library skip ffprobe for every title that has not been touched.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            self._entries: Dict[str, Dict[str, Any]] = _json_loads(path.read_bytes())
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def _stat_key(stat: os.stat_result) -> List[int]:
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def get(self, path: Path, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(str(path))
+        if entry and entry.get("stat") == self._stat_key(stat):
+            return entry.get("probe")
+        return None
+
+    def put(self, path: Path, stat: os.stat_result, probe: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[str(path)] = {"stat": self._stat_key(stat), "probe": probe}
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(self._entries)
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def ffprobe_media(
+    path: Path,
+    toolchain: FFmpegToolchain,
+    cache: Optional[ProbeCache] = None,
+    logger: Optional[Logger] = None,
+) -> MediaInfo:
+    key = path.absolute()
+    st = path.stat()
+    data = cache.get(key, st) if cache else None
+    if data is None:
+        data = _run_ffprobe(path, toolchain)
+        if not _probe_is_complete(data):
+            if logger:
+                logger.warning(f"Header probe of {path.name} was incomplete; retrying with full stream analysis")
+            data = _run_ffprobe(path, toolchain, capped=False)
+            data[_FULL_ANALYSIS_KEY] = True
+        if cache:
+            cache.put(key, st, data)
+    return _media_info_from_probe(path, data)
+
+
+# Only the fields consumed by _media_info_from_probe/_build_stream_info, so
+# ffprobe does not serialise every codec parameter of every stream.
+_FFPROBE_ENTRIES = ":".join(
+    (
+        "format=duration,size",
+        "format_tags",
+        "stream=index,codec_name,codec_type,channels,bit_rate,sample_rate,width,height,pix_fmt,"
+        "bits_per_raw_sample,color_transfer,color_space,color_primaries,color_range",
+        "stream_tags",
+        "stream_disposition",
+        "stream_side_data_list",
+    )
+)
+
+
+# Everything we need normally comes from the container header, so ffprobe is
+# kept from decoding seconds of frames to fill in stream parameters.  When that
+# was enough, the encode's own ffmpeg gets the same limits (see
+# MediaInfo.header_probe_complete); otherwise the probe data is tagged with
+# _FULL_ANALYSIS_KEY, which is also stored in the probe cache.
+_FULL_ANALYSIS_KEY = "av1conv_full_analysis"
+_PROBE_SIZE = "5M"
+_ANALYZE_DURATION = "1M"
+
+
+def _is_positive(value: Any) -> bool:
+    # ffprobe reports unknown numbers as 0 or "0"
+    try:
+        return float(value) > 0
+    except (TypeError, ValueError):
+        return False
+
+
+def _probe_is_complete(data: Dict[str, Any]) -> bool:
+    """Return whether a capped probe produced the fields the encoder needs.
+
+    Every stream counts, not just the video: audio or subtitles that start
+    late (common in MPEG-TS) show up with unknown parameters in a capped
+    probe, and the encode would get the same caps and mis-detect them.
+    """
+
+    if not data.get("format", {}).get("duration"):
+        return False
+    has_video = False
+    for stream in data.get("streams", []):
+        codec_type = stream.get("codec_type")
+        if codec_type in ("video", "audio", "subtitle") and not stream.get("codec_name"):
+            return False
+        if codec_type == "video" and not has_video:
+            if not (_is_positive(stream.get("width")) and _is_positive(stream.get("height"))):
+                return False
+            has_video = True
+        elif codec_type == "audio":
+            if not (_is_positive(stream.get("sample_rate")) and _is_positive(stream.get("channels"))):
+                return False
+    return has_video
+
+
+def _run_ffprobe(path: Path, toolchain: FFmpegToolchain, capped: bool = True) -> Dict[str, Any]:
+    command = [str(toolchain.ffprobe), "-hide_banner"]
+    if capped:
+        command.extend(["-probesize", _PROBE_SIZE, "-analyzeduration", _ANALYZE_DURATION])
+    command.extend([
         "-print_format",
         "json",
-        "-show_format",
-        "-show_streams",
+        "-show_entries",
+        _FFPROBE_ENTRIES,
         str(path),
-    ]
+    ])
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
+        result = subprocess.run(command, capture_output=True, check=True, **_SPAWN_KWARGS)
     except subprocess.CalledProcessError as exc:
-        raise RuntimeError(f"ffprobe failed for {path}: {exc.stderr}")
-    data = json.loads(result.stdout)
+        stderr = exc.stderr.decode("utf-8", "replace") if exc.stderr else ""
+        raise RuntimeError(f"ffprobe failed for {path}: {stderr}")
+    return _json_loads(result.stdout)
+
+
+def _media_info_from_probe(path: Path, data: Dict[str, Any]) -> MediaInfo:
     format_tags = data.get("format", {}).get("tags", {}) or {}
     duration = float(data.get("format", {}).get("duration", 0.0) or 0.0)
     size_bytes = int(data.get("format", {}).get("size", 0) or path.stat().st_size)
@@ -524,7 +834,34 @@ def ffprobe_media(path: Path, toolchain: FFmpegToolchain) -> MediaInfo:
     audio_streams = [_build_stream_info(s) for s in data.get("streams", []) if s.get("codec_type") == "audio"]
     subtitle_streams = [_build_stream_info(s) for s in data.get("streams", []) if s.get("codec_type") == "subtitle"]
 
-    return MediaInfo(path=path, format_tags=format_tags, video=video, audio_streams=audio_streams, subtitle_streams=subtitle_streams, duration=duration, size_bytes=size_bytes)
+    return MediaInfo(path=path, format_tags=format_tags, video=video, audio_streams=audio_streams, subtitle_streams=subtitle_streams, duration=duration, size_bytes=size_bytes, header_probe_complete=not data.get(_FULL_ANALYSIS_KEY))
+
+
+_MASTER_DISPLAY_KEYS = (
+    "display_primaries_x",
+    "display_primaries_y",
+    "white_point_x",
+    "white_point_y",
+    "min_luminance",
+    "max_luminance",
+)
+
+
+def _hdr_side_data(side_data_list: Iterable[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+    """Return the ``-master_display`` and ``-content_light`` values of a stream."""
+
+    master_display = content_light = None
+    for data in side_data_list:
+        kind = data.get("side_data_type", "").lower()
+        values = data.get("metadata", {})
+        if kind == "mastering display metadata":
+            metadata = [str(values[key]) for key in _MASTER_DISPLAY_KEYS if key in values]
+            if metadata:
+                master_display = ":".join(metadata)
+        elif kind == "content light level":
+            if "max_content" in values and "max_average" in values:
+                content_light = f"{values['max_content']}:{values['max_average']}"
+    return master_display, content_light
 
 
 def _build_stream_info(data: Dict[str, Any]) -> StreamInfo:
@@ -537,6 +874,8 @@ def _build_stream_info(data: Dict[str, Any]) -> StreamInfo:
             bit_rate = float(data["bit_rate"])
         except ValueError:
             pass
+    side_data_list = data.get("side_data_list", []) or []
+    master_display, content_light = _hdr_side_data(side_data_list)
     return StreamInfo(
         index=int(data.get("index", 0)),
         codec=data.get("codec_name"),
@@ -555,7 +894,9 @@ def _build_stream_info(data: Dict[str, Any]) -> StreamInfo:
         color_space=data.get("color_space"),
         color_primaries=data.get("color_primaries"),
         color_range=data.get("color_range"),
-        side_data_list=data.get("side_data_list", []) or [],
+        side_data_list=side_data_list,
+        master_display=master_display,
+        content_light=content_light,
     )
 
 
@@ -629,6 +970,11 @@ def estimate_grain_level(info: MediaInfo) -> int:
 # ---------------------------------------------------------------------------
 
 
+_AUDIO_CODEC_SCORES = {"opus": 2, "libopus": 2, "aac": 1, "libfdk_aac": 1}
+# MP4 text subtitles cannot be stream-copied into Matroska
+_SUB_REENCODE_CODECS = frozenset({"mov_text", "tx3g"})
+
+
 def choose_audio_stream(info: MediaInfo, config: Config, toolchain: FFmpegToolchain, logger: Logger) -> StreamInfo:
     if not info.audio_streams:
         raise RuntimeError(f"No audio streams found in {info.path}")
@@ -637,18 +983,20 @@ def choose_audio_stream(info: MediaInfo, config: Config, toolchain: FFmpegToolch
     if not candidates:
         candidates = info.audio_streams
     # Prefer streams already Opus/AAC unless downmix is requested
-    def score(stream: StreamInfo) -> Tuple[int, int, int, int, float]:
-        default_score = 1 if stream.disposition.get("default") else 0
-        forced_penalty = -1 if stream.disposition.get("commentary") else 0
-        codec_score = 0
-        if stream.codec in {"opus", "libopus"}:
-            codec_score = 2
-        elif stream.codec in {"aac", "libfdk_aac"}:
-            codec_score = 1
-        channel_score = -(stream.channels or 2)
-        return (default_score, forced_penalty, codec_score, channel_score, -(stream.bit_rate or 0))
-
-    selected = max(candidates, key=score)
+    selected = candidates[0]
+    best_key: Optional[Tuple[int, int, int, int, float]] = None
+    for stream in candidates:
+        disposition = stream.disposition
+        key = (
+            1 if disposition.get("default") else 0,
+            -1 if disposition.get("commentary") else 0,
+            _AUDIO_CODEC_SCORES.get(stream.codec, 0),
+            -(stream.channels or 2),
+            -(stream.bit_rate or 0),
+        )
+        # Strictly greater keeps the first of equally ranked streams, as max() did
+        if best_key is None or key > best_key:
+            selected, best_key = stream, key
     logger.info(f"Selected audio stream {selected.index} ({selected.codec}, {selected.channels}ch)", "cyan", always=True)
     return selected
 
@@ -716,166 +1064,168 @@ _VIDEO_EXTENSIONS = {
     ".rm",
     ".rmvb",
 }
+# str.endswith takes a tuple, which saves splitting the suffix off every name
+_VIDEO_EXT_TUPLE = tuple(_VIDEO_EXTENSIONS)
+
 
+def should_skip_file(path: Union[Path, "os.DirEntry[str]"], config: Config) -> bool:
+    """Return whether *path* should be left alone.
 
-def should_skip_file(path: Path, config: Config) -> bool:
-    if not path.is_file():
+    Accepts a :class:`~pathlib.Path` or an :class:`os.DirEntry`; either way
+    the file is stat'ed at most once (a ``DirEntry`` may already hold the
+    result from the directory scan).
+    """
+
+    name = path.name
+    name_lower = name.lower()
+    if not name_lower.endswith(_VIDEO_EXT_TUPLE):
         return True
-    if path.suffix.lower() not in _VIDEO_EXTENSIONS:
+    if name_lower.endswith(".av1.mkv"):
         return True
-    if path.name.lower().endswith(".av1.mkv"):
+    try:
+        st = path.stat()
+    except OSError:
         return True
-    if path.stat().st_size < config.size_threshold_bytes and not config.force:
+    if not stat.S_ISREG(st.st_mode):
+        return True
+    if st.st_size < config.size_threshold_bytes and not config.force:
+        return True
+    pattern = config.ignore_pattern
+    if pattern is not None and pattern.search(name):
         return True
-    name_upper = path.name.upper()
-    for keyword in config.ignore_terms + config.extra_ignore_terms:
-        if keyword.upper() in name_upper:
-            return True
     return False
 
 
-def build_encode_plan(info: MediaInfo, config: Config, toolchain: FFmpegToolchain, logger: Logger) -> EncodePlan:
-    audio_stream = choose_audio_stream(info, config, toolchain, logger)
-    subtitle_streams = choose_subtitle_streams(info, config, logger)
-
-    if info.video.codec in {"av1"} and not config.force_reencode:
-        raise RuntimeError("Source already encoded with AV1. Use --force-reencode to override.")
+def plan_skip_reason(info: MediaInfo, config: Config) -> Optional[str]:
+    """Return why *info* must not be encoded, or ``None`` if it may be."""
 
+    if info.video.codec == "av1" and not config.force_reencode:
+        return "Source already encoded with AV1. Use --force-reencode to override."
     if config.skip_dolby_vision and info.has_dolby_vision:
-        raise RuntimeError("Dolby Vision stream skipped as per configuration")
+        return "Dolby Vision stream skipped as per configuration"
+    return None
+
+
+def _make_temp_dir(info: MediaInfo, config: Config, session_dir: Optional[Path]) -> Path:
+    """Create the scratch directory for one encode.
+
+    Inside a session directory the per-file folder is simply named after the
+    source; a name clash (same stem in two folders) falls back to mkdtemp.
+    """
 
-    content_type = detect_content_type(info)
+    if session_dir is None:
+        return Path(tempfile.mkdtemp(prefix="av1conv-", dir=config.temp_root))
+    temp_dir = session_dir / info.path.stem
+    try:
+        temp_dir.mkdir()
+    except FileExistsError:
+        return Path(tempfile.mkdtemp(prefix=f"{info.path.stem}-", dir=session_dir))
+    return temp_dir
+
+
+def build_encode_plan(
+    info: MediaInfo,
+    config: Config,
+    toolchain: FFmpegToolchain,
+    logger: Logger,
+    session_dir: Optional[Path] = None,
+) -> EncodePlan:
+    # Cheap checks first, so rejected sources never reach stream selection
+    reason = plan_skip_reason(info, config)
+    if reason:
+        raise RuntimeError(reason)
+
+    audio_stream = choose_audio_stream(info, config, toolchain, logger)
+    subtitle_streams = choose_subtitle_streams(info, config, logger)
+
+    content_type = info.content_type
     crf = config.content_type_crf(content_type) if config.detect_grain else config.crf
     preset = config.content_type_preset(content_type) if config.detect_grain else config.preset
 
     film_grain = config.svt_film_grain
     if config.detect_grain:
-        film_grain = max(film_grain, estimate_grain_level(info))
+        film_grain = max(film_grain, info.grain_level)
 
     output_dir = info.path.parent
     final_destination = output_dir / f"{info.path.stem}.av1.mkv"
 
-    temp_dir = Path(tempfile.mkdtemp(prefix="av1conv-", dir=config.temp_root))
+    temp_dir = _make_temp_dir(info, config, session_dir)
     temp_file = temp_dir / f"{info.path.stem}.tmp.mkv"
 
-    cmd: List[str] = [str(toolchain.ffmpeg)]
-    if config.lazy:
-        cmd = ["nice", "-n", "10", *cmd]
-    cmd.extend([
+    if toolchain.supports_libopus:
+        audio_codec = "libopus"
+    elif toolchain.supports_aac:
+        audio_codec = "aac"
+    else:
+        raise RuntimeError("FFmpeg build lacks both libopus and AAC encoders")
+
+    is_hdr = info.is_hdr
+    pix_fmt = "yuv420p10le" if is_hdr or (info.video.bits_per_raw_sample or 8) > 8 else "yuv420p"
+
+    cmd: List[str] = [
+        *(("nice", "-n", "10") if config.lazy else ()),
+        str(toolchain.ffmpeg),
         "-hide_banner",
+        "-nostdin",
         "-y",
-        "-i",
-        str(info.path),
-        "-map",
-        f"0:{info.video.index}",
-        "-map",
-        f"0:{audio_stream.index}",
-        "-c:v",
-        "libsvtav1",
-        "-preset",
-        str(preset),
-        "-crf",
-        str(crf),
-        "-g",
-        str(config.gop),
-        "-pix_fmt",
-        "yuv420p10le" if info.is_hdr or (info.video.bits_per_raw_sample or 8) > 8 else "yuv420p",
-        "-threads",
-        str(config.ffmpeg_threads),
-    ])
+        *(("-probesize", _PROBE_SIZE, "-analyzeduration", _ANALYZE_DURATION) if info.header_probe_complete else ()),
+        "-i", str(info.path),
+        "-map", f"0:{info.video.index}",
+        "-map", f"0:{audio_stream.index}",
+        "-c:v", "libsvtav1",
+        "-preset", str(preset),
+        "-crf", str(crf),
+        "-g", str(config.gop),
+        "-pix_fmt", pix_fmt,
+        "-threads", str(config.ffmpeg_threads),
+    ]
 
-    if info.is_hdr:
-        color_primaries = info.video.color_primaries or "bt2020"
-        color_space = info.video.color_space or "bt2020nc"
-        color_transfer = info.video.color_transfer or "smpte2084"
-        cmd.extend([
-            "-color_primaries",
-            color_primaries,
-            "-colorspace",
-            color_space,
-            "-color_trc",
-            color_transfer,
-        ])
-        for data in info.video.side_data_list:
-            if data.get("side_data_type", "").lower() == "mastering display metadata":
-                master = data.get("metadata", {})
-                metadata = []
-                for key in ("display_primaries_x", "display_primaries_y", "white_point_x", "white_point_y", "min_luminance", "max_luminance"):
-                    if key in master:
-                        metadata.append(str(master[key]))
-                if metadata:
-                    cmd.extend(["-master_display", ":".join(metadata)])
-            if data.get("side_data_type", "").lower() == "content light level":
-                values = data.get("metadata", {})
-                if "max_content" in values and "max_average" in values:
-                    cmd.extend(["-content_light", f"{values['max_content']}:{values['max_average']}"])
+    if is_hdr:
+        cmd += (
+            "-color_primaries", info.video.color_primaries or "bt2020",
+            "-colorspace", info.video.color_space or "bt2020nc",
+            "-color_trc", info.video.color_transfer or "smpte2084",
+        )
+        if info.video.master_display:
+            cmd += ("-master_display", info.video.master_display)
+        if info.video.content_light:
+            cmd += ("-content_light", info.video.content_light)
     else:
-        if info.video.color_primaries:
-            cmd.extend(["-color_primaries", info.video.color_primaries])
-        if info.video.color_transfer:
-            cmd.extend(["-color_trc", info.video.color_transfer])
-        if info.video.color_space:
-            cmd.extend(["-colorspace", info.video.color_space])
+        for option, value in (
+            ("-color_primaries", info.video.color_primaries),
+            ("-color_trc", info.video.color_transfer),
+            ("-colorspace", info.video.color_space),
+        ):
+            if value:
+                cmd += (option, value)
 
     if config.resize and info.video.height and info.video.height > config.resize_target_height:
-        cmd.extend(["-vf", f"scale=-2:{config.resize_target_height}"])
+        cmd += ("-vf", f"scale=-2:{config.resize_target_height}")
 
     if film_grain:
-        cmd.extend(["-svtav1-film-grain", str(film_grain)])
-
-    cmd.extend([
-        "-svtav1-tune",
-        str(config.svt_tune),
-        "-svtav1-enable-overlays",
-        str(config.svt_enable_overlays),
-        "-svtav1-fast-decode",
-        str(config.svt_fast_decode),
-        "-svtav1-lookahead",
-        str(config.svt_lookahead),
-        "-svtav1-enable-qm",
-        str(config.svt_enable_qm),
-        "-svtav1-qm-min",
-        str(config.svt_qm_min),
-        "-svtav1-qm-max",
-        str(config.svt_qm_max),
-        "-svtav1-tile-columns",
-        str(config.svt_tile_columns),
-        "-svtav1-aq-mode",
-        str(config.svt_aq_mode),
-        "-svtav1-sharpness",
-        str(config.svt_sharpness),
-    ])
+        cmd += ("-svtav1-film-grain", str(film_grain))
+
+    cmd += config.svt_args
 
     # Audio encoding parameters
-    audio_codec = None
     if config.stereo_downmix:
-        cmd.extend(["-ac", "2"])
+        cmd += ("-ac", "2")
     if config.audio_bitrate_override:
-        cmd.extend(["-b:a", config.audio_bitrate_override])
-    if toolchain.supports_libopus:
-        audio_codec = "libopus"
-    elif toolchain.supports_aac:
-        audio_codec = "aac"
-    if not audio_codec:
-        raise RuntimeError("FFmpeg build lacks both libopus and AAC encoders")
-    cmd.extend(["-c:a", audio_codec])
-    cmd.extend(["-disposition:a:0", "default"])
+        cmd += ("-b:a", config.audio_bitrate_override)
+    cmd += ("-c:a", audio_codec, "-disposition:a:0", "default")
 
     # Subtitle handling
     for sub_index, stream in enumerate(subtitle_streams):
-        cmd.extend(["-map", f"0:{stream.index}"])
-        codec_opt = "srt" if stream.codec in {"mov_text", "tx3g"} else "copy"
-        cmd.extend([f"-c:s:{sub_index}", codec_opt])
+        codec_opt = "srt" if stream.codec in _SUB_REENCODE_CODECS else "copy"
+        cmd += ("-map", f"0:{stream.index}", f"-c:s:{sub_index}", codec_opt)
         if stream.disposition.get("forced"):
-            cmd.extend([f"-disposition:s:{sub_index}", "forced"])
+            cmd += (f"-disposition:s:{sub_index}", "forced")
 
-    cmd.extend([
-        "-metadata",
-        f"encoding_tool=av1conv.py ({config.reencoded_by})",
-        "-metadata",
-        "encoder=libsvtav1",
+    cmd += (
+        "-metadata", f"encoding_tool=av1conv.py ({config.reencoded_by})",
+        "-metadata", "encoder=libsvtav1",
         str(temp_file),
-    ])
+    )
 
     return EncodePlan(
         source=info.path,
@@ -902,32 +1252,70 @@ class EncodeResult:
     savings_bytes: int = 0
 
 
+def _move_into_place(src: Path, dst: Path) -> None:
+    """Rename ``src`` over ``dst``, copying only when they sit on different filesystems.
+
+    The cross-device copy goes to ``dst.partial`` and is renamed over ``dst``,
+    so an existing ``dst`` is only replaced once the copy is complete.
+    """
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+
+    partial = dst.with_name(dst.name + ".partial")
+    try:
+        shutil.copy2(src, partial)
+        os.replace(partial, dst)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.unlink(src)
+
+
 def execute_plan(plan: EncodePlan, config: Config, logger: Logger) -> EncodeResult:
+    return finalize_plan(plan, config, logger, run_encode(plan, config, logger))
+
+
+def run_encode(plan: EncodePlan, config: Config, logger: Logger) -> int:
+    """Run the ffmpeg command of *plan* and return the size of its output."""
+
     logger.notice("Running ffmpeg command:\n" + " ".join(shlex.quote(part) for part in plan.command))
     temp_dir = plan.temp_dir
+    logger.flush()
     try:
-        subprocess.run(plan.command, check=True)
+        # Parallel encodes share the terminal; none of them should read keys from it
+        subprocess.run(plan.command, check=True, stdin=subprocess.DEVNULL, **_SPAWN_KWARGS)
     except subprocess.CalledProcessError as exc:
         if config.cleanup_on_exit:
             shutil.rmtree(temp_dir, ignore_errors=True)
         raise RuntimeError(f"ffmpeg failed: {exc}")
 
-    if not plan.temp_file.exists():
+    try:
+        # The move keeps the size, so this one stat also answers new_size
+        new_size = plan.temp_file.stat().st_size
+    except FileNotFoundError:
         if config.cleanup_on_exit:
             shutil.rmtree(temp_dir, ignore_errors=True)
         raise RuntimeError("Temporary output missing after ffmpeg run")
+    return new_size
+
 
+def finalize_plan(plan: EncodePlan, config: Config, logger: Logger, new_size: int) -> EncodeResult:
+    """Move a finished encode into place and apply the keep/revert policy."""
+
+    temp_dir = plan.temp_dir
     final_destination = plan.final_destination
     if final_destination.exists():
         logger.warning(f"Overwriting existing file {final_destination}")
-        final_destination.unlink()
-    shutil.move(str(plan.temp_file), str(final_destination))
+    _move_into_place(plan.temp_file, final_destination)
     if config.cleanup_on_exit:
         shutil.rmtree(temp_dir, ignore_errors=True)
     else:
         logger.info(f"Preserved temporary directory at {temp_dir}", always=True)
 
-    new_size = final_destination.stat().st_size
     savings = plan.source_size - new_size
     reverted = False
 
@@ -993,30 +1381,103 @@ def human_readable_bytes(value: int) -> str:
     return f"-{result}" if negative else result
 
 
-def process_file(path: Path, config: Config, toolchain: FFmpegToolchain, logger: Logger) -> EncodeResult:
-    if should_skip_file(path, config) and not config.force:
+def process_file(
+    path: Path,
+    config: Config,
+    toolchain: FFmpegToolchain,
+    logger: Logger,
+    probe_cache: Optional[ProbeCache] = None,
+    info: Optional[MediaInfo] = None,
+    filtered: Optional[bool] = None,
+    session_dir: Optional[Path] = None,
+    finalizer: Optional[concurrent.futures.Executor] = None,
+) -> Union[EncodeResult, "concurrent.futures.Future[EncodeResult]"]:
+    """Probe, plan and encode *path*.
+
+    With a *finalizer* executor only the encode runs on the calling thread;
+    moving the output into place is queued on the executor and its future
+    returned, so the caller can start the next encode straight away.
+    """
+
+    if filtered is None:
+        filtered = should_skip_file(path, config)
+    if filtered and not config.force:
         logger.info(f"Skipping {path} (filtered by heuristics)", always=True)
         return EncodeResult(path, path, skipped=True, reverted=False, message="Filtered by heuristics")
-    info = ffprobe_media(path, toolchain)
-    plan = build_encode_plan(info, config, toolchain, logger)
-    result = execute_plan(plan, config, logger)
-    return result
+    if info is None:
+        info = ffprobe_media(path, toolchain, probe_cache, logger)
+    reason = plan_skip_reason(info, config)
+    if reason:
+        logger.info(f"Skipping {path}: {reason}", always=True)
+        return EncodeResult(path, path, skipped=True, reverted=False, message=reason)
+    plan = build_encode_plan(info, config, toolchain, logger, session_dir)
+    if finalizer is None:
+        return execute_plan(plan, config, logger)
+    new_size = run_encode(plan, config, logger)
+    return finalizer.submit(finalize_plan, plan, config, logger, new_size)
+
+
+def probe_all(
+    paths: Sequence[Path],
+    toolchain: FFmpegToolchain,
+    logger: Logger,
+    probe_cache: Optional[ProbeCache] = None,
+    workers: Optional[int] = None,
+) -> Dict[Path, MediaInfo]:
+    """Probe *paths* concurrently and return the results keyed by path.
+
+    Each ffprobe is an independent short-lived process, so the scan runs on
+    its own pool sized for I/O rather than ``max_parallel_jobs``.  Files that
+    fail to probe are left out; :func:`process_file` probes them again and
+    reports the error in its usual place.
+    """
+
+    if workers is None:
+        workers = min(32, (os.cpu_count() or 1) * 2)
+
+    def probe(path: Path) -> Optional[MediaInfo]:
+        try:
+            return ffprobe_media(path, toolchain, probe_cache, logger)
+        except Exception:  # pragma: no cover - reported by process_file
+            return None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = executor.map(probe, paths)
+        return {path: info for path, info in zip(paths, results) if info is not None}
 
 
-def process_batch(paths: Sequence[Path], config: Config, toolchain: FFmpegToolchain, logger: Logger) -> SessionReport:
+def _encode_cost(info: Optional[MediaInfo]) -> float:
+    """Rough relative encode time of a probed title (pixels x seconds)."""
+
+    if info is None:
+        return 0.0
+    video = info.video
+    pixels = (video.width or 1920) * (video.height or 1080)
+    return pixels * (info.duration or info.size_bytes / 1_000_000)
+
+
+def process_batch(
+    paths: Sequence[Path],
+    config: Config,
+    toolchain: FFmpegToolchain,
+    logger: Logger,
+    probe_cache: Optional[ProbeCache] = None,
+    session_dir: Optional[Path] = None,
+) -> SessionReport:
     report = SessionReport()
     lock = threading.Lock()
 
-    def worker(path: Path) -> None:
-        nonlocal report
-        try:
-            result = process_file(path, config, toolchain, logger)
-        except Exception as exc:  # pragma: no cover - defensive
-            with lock:
-                report.failures.append(f"{path}: {exc}")
-                report.skipped += 1
-            logger.error(f"Failed to process {path}: {exc}")
-            return
+    filtered = {path: should_skip_file(path, config) for path in paths}
+    wanted = [path for path in paths if config.force or not filtered[path]]
+    probed = probe_all(wanted, toolchain, logger, probe_cache)
+
+    def fail(path: Path, exc: BaseException) -> None:
+        with lock:
+            report.failures.append(f"{path}: {exc}")
+            report.skipped += 1
+        logger.error(f"Failed to process {path}: {exc}")
+
+    def record(path: Path, result: EncodeResult) -> None:
         with lock:
             if result.skipped:
                 report.skipped += 1
@@ -1027,13 +1488,42 @@ def process_batch(paths: Sequence[Path], config: Config, toolchain: FFmpegToolch
                 report.reverted += 1
         logger.success(f"Finished {path.name}: {result.message}")
 
+    def settle(path: Path, future: "concurrent.futures.Future[EncodeResult]") -> None:
+        try:
+            result = future.result()
+        except Exception as exc:  # pragma: no cover - defensive
+            fail(path, exc)
+            return
+        record(path, result)
+
+    def worker(path: Path) -> None:
+        try:
+            outcome = process_file(
+                path, config, toolchain, logger, probe_cache, probed.get(path), filtered[path], session_dir, finalizer
+            )
+        except Exception as exc:  # pragma: no cover - defensive
+            fail(path, exc)
+            return
+        if isinstance(outcome, concurrent.futures.Future):
+            outcome.add_done_callback(functools.partial(settle, path))
+        else:
+            record(path, outcome)
+
+    # Moving a finished encode out of the temp directory (a full copy when it
+    # lives on another filesystem) runs on its own thread, overlapping with
+    # the next encode instead of holding an encode slot.
     max_workers = max(1, config.max_parallel_jobs)
-    if max_workers == 1:
-        for path in paths:
-            worker(path)
-    else:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            list(executor.map(worker, paths))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="av1conv-finalize") as finalizer:
+        if max_workers == 1:
+            for path in paths:
+                worker(path)
+        else:
+            # Idle workers pull the next file from the executor's queue as soon as
+            # their encode finishes; starting the most expensive titles first
+            # keeps a long 4K encode from being the lone job at the end.
+            ordered = sorted(paths, key=lambda path: _encode_cost(probed.get(path)), reverse=True)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(worker, ordered))
 
     logger.notice(
         f"Summary: processed={report.processed}, skipped={report.skipped}, reverted={report.reverted}, savings={human_readable_bytes(report.total_savings)}"
@@ -1051,9 +1541,19 @@ def discover_files(config: Config) -> List[Path]:
     if not directory.exists():
         raise RuntimeError(f"Directory does not exist: {directory}")
     files: List[Path] = []
-    for entry in directory.rglob("*"):
-        if entry.is_file() and entry.suffix.lower() in _VIDEO_EXTENSIONS:
-            files.append(entry)
+    pending = [str(directory)]
+    while pending:
+        try:
+            scanner = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with scanner:
+            for entry in scanner:
+                # d_type from the directory listing answers these without a stat
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.lower().endswith(_VIDEO_EXT_TUPLE) and entry.is_file():
+                    files.append(Path(entry.path))
     return sorted(files)
 
 
@@ -1077,6 +1577,11 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     if args.directory:
         config.directory = Path(args.directory)
 
+    if config.auto_threads:
+        auto_tune_parallelism(config, logger)
+    elif args.ffmpeg_threads is None:
+        limit_threads_per_job(config, logger)
+
     try:
         toolchain = find_ffmpeg(config, logger)
     except Exception as exc:
@@ -1094,11 +1599,9 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         if not test_path.exists():
             logger.error(f"Detect grain test file not found: {test_path}")
             return 1
-        info = ffprobe_media(test_path, toolchain)
-        content_type = detect_content_type(info)
-        film_grain = estimate_grain_level(info)
-        logger.notice(f"Content type heuristic: {content_type}")
-        logger.notice(f"Estimated grain strength: {film_grain}")
+        info = ffprobe_media(test_path, toolchain, logger=logger)
+        logger.notice(f"Content type heuristic: {info.content_type}")
+        logger.notice(f"Estimated grain strength: {info.grain_level}")
         return 0
 
     try:
@@ -1113,9 +1616,25 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
     logger.notice(f"Found {len(files)} candidate files")
 
-    report = process_batch(files, config, toolchain, logger)
+    probe_cache = ProbeCache(_default_cache_dir() / "probe_cache.json") if config.probe_cache else None
+    # One directory per run; each encode works in a subfolder that is removed
+    # as soon as the file is done, and whatever is left goes with the session.
+    session_dir = Path(tempfile.mkdtemp(prefix="av1conv-session-", dir=config.temp_root))
+    try:
+        report = process_batch(files, config, toolchain, logger, probe_cache, session_dir)
+    finally:
+        if config.cleanup_on_exit:
+            shutil.rmtree(session_dir, ignore_errors=True)
+        else:
+            logger.info(f"Preserved session temporary directory at {session_dir}", always=True)
+        if probe_cache:
+            try:
+                probe_cache.save()
+            except OSError as exc:
+                logger.warning(f"Unable to write ffprobe cache {probe_cache.path}: {exc}")
 
     if args.generate_report:
+        logger.flush()
         print(report.to_json())
 
     return 0 if not report.failures else 1
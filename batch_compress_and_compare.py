@@ -9,13 +9,27 @@ batch_compress_and_compare.py  (v3.0.0)
 5) Moves original → ./over/    and    compressed → ./output/
 
 Usage:
-    python batch_compress_and_compare.py
+    python batch_compress_and_compare.py [--fast-compare]
+
+    --fast-compare  take the original's metadata from ffmpeg's own input
+                    banner instead of running ffprobe on it
 """
 
+import argparse
+import contextlib
+import errno
+import io
+import os
+import re
 import subprocess
 import shutil
+import sys
+import tempfile
+import threading
 import time
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
@@ -26,10 +40,14 @@ from datetime import datetime
 FFMPEG_CMD = "ffmpeg"
 FFPROBE_CMD = "ffprobe"
 
+# Each ffmpeg gets this many threads; as many files as fit in the machine's
+# cores are encoded at once.
+THREADS_PER_JOB = 4
+
 # Video-encoding options:
 VIDEO_OPTIONS = [
     "-c:v", "libsvtav1",
-    "-threads", "8",
+    "-threads", str(THREADS_PER_JOB),
     "-crf", "22",
     "-g", "240",
     "preset", "6",
@@ -48,10 +66,16 @@ VIDEO_EXTENSIONS = [
     ".avi", ".mpg", ".mp4", ".flv", ".3gp",
     ".mkv", ".wmv", ".mov", ".mts", ".vob", ".webm"
 ]
+EXT_TUPLE = tuple(VIDEO_EXTENSIONS)
 
 DIR_OVER = Path("over")
 DIR_OUTPUT = Path("output")
 
+# mkstemp creates files as 0600; outputs get the mode a plain open() would give.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+OUTPUT_MODE = 0o666 & ~_UMASK
+
 
 # ------------------------------------------------------------------------
 #  HELPERS: ffprobe + human-readable formatting
@@ -63,17 +87,31 @@ def human_readable_size(bytes_size: int) -> str:
     return f"{mb:.2f} MB"
 
 
+def move_replacing(src: Path, dst: Path):
+    """
+    Move src to dst, replacing dst if it exists. Within one filesystem this is
+    a single atomic rename; across filesystems shutil.move copies over dst
+    (via sendfile on Linux). Any other error is raised with dst untouched.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), str(dst))
+
+
 def run_ffprobe(path: Path) -> dict:
     """
     Run ffprobe on 'path' and return a JSON-parsed dict containing
-    both 'format' and 'streams' sections.
+    the 'format' and 'streams' fields that extract_summary() needs.
     """
     cmd = [
         FFPROBE_CMD,
         "-v", "quiet",
         "-print_format", "json",
-        "-show_format",
-        "-show_streams",
+        # only the fields extract_summary() reads
+        "-show_entries", "format=duration,bit_rate,size:stream=codec_type,codec_name,width,height",
         str(path)
     ]
     try:
@@ -126,22 +164,77 @@ def extract_summary(probe_info: dict) -> dict:
     return summary
 
 
-def print_comparison(orig_path: Path, comp_path: Path):
+def probe_summary(path: Path) -> dict:
+    """Return extract_summary(run_ffprobe(path))."""
+    return extract_summary(run_ffprobe(path))
+
+
+_LOG_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_LOG_BITRATE_RE = re.compile(r"bitrate: (\d+) kb/s")
+_LOG_VIDEO_RE = re.compile(r"Stream #\S+: Video: ([\w-]+)")
+_LOG_RESOLUTION_RE = re.compile(r"[\s,](\d{2,5})x(\d{2,5})(?=[\s,\[]|$)")
+_LOG_AUDIO_RE = re.compile(r"Stream #\S+: Audio: ([\w-]+)")
+
+
+def summary_from_ffmpeg_log(header_lines, file_size: int) -> dict:
+    """
+    Build the same dict as extract_summary() from the "Input #0" banner that
+    ffmpeg prints before encoding, so the original needs no ffprobe run.
+    The bitrate is ffmpeg's rounded kb/s figure.
     """
-    Use ffprobe on both orig_path and comp_path, then print a side-by-side summary:
+    summary = {
+        "duration": None,
+        "bit_rate": None,
+        "file_size": file_size,
+        "video_codec": None,
+        "width": None,
+        "height": None,
+        "audio_codec": None
+    }
+    for line in header_lines:
+        if summary["duration"] is None:
+            m = _LOG_DURATION_RE.search(line)
+            if m:
+                h, mnt, sec = m.groups()
+                summary["duration"] = int(h) * 3600 + int(mnt) * 60 + float(sec)
+                b = _LOG_BITRATE_RE.search(line)
+                if b:
+                    summary["bit_rate"] = int(b.group(1)) * 1000
+                continue
+        if summary["video_codec"] is None:
+            m = _LOG_VIDEO_RE.search(line)
+            if m:
+                summary["video_codec"] = m.group(1)
+                r = _LOG_RESOLUTION_RE.search(line)
+                if r:
+                    summary["width"], summary["height"] = int(r.group(1)), int(r.group(2))
+                continue
+        if summary["audio_codec"] is None:
+            m = _LOG_AUDIO_RE.search(line)
+            if m:
+                summary["audio_codec"] = m.group(1)
+    return summary
+
+
+def print_comparison(orig_path: Path, comp_path: Path, orig_sum: dict = None):
+    """
+    Use ffprobe on both orig_path and comp_path (or only comp_path when the
+    original's summary is passed in), then print a side-by-side summary:
       • Duration
       • Bitrate
       • File size
       • Video codec + resolution
       • Audio codec
     """
-    print("  ↳ Running ffprobe on both files for comparison…")
-
-    orig_info = run_ffprobe(orig_path)
-    comp_info = run_ffprobe(comp_path)
+    print("  ↳ Running ffprobe on both files for comparison…" if orig_sum is None
+          else "  ↳ Running ffprobe on the compressed file for comparison…")
 
-    orig_sum = extract_summary(orig_info)
-    comp_sum = extract_summary(comp_info)
+    if orig_sum is not None:
+        comp_sum = probe_summary(comp_path)
+    else:
+        # The two probes are independent, so run them side by side
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            orig_sum, comp_sum = ex.map(probe_summary, [orig_path, comp_path])
 
     # Header
     headers = [
@@ -235,12 +328,15 @@ def print_comparison(orig_path: Path, comp_path: Path):
 #  MAIN COMPRESSION + COMPARISON LOGIC
 # ------------------------------------------------------------------------
 
-def process_video(input_path: Path):
+def process_video(input_path: Path, fast_compare: bool = False):
     """
     1) Runs ffmpeg to compress into AV1/Opus → temp file
     2) If ffmpeg succeeded, runs ffprobe on both original & compressed
        and prints a comparison.
     3) Moves original → over/, compressed → output/
+
+    Returns a dict with the file name, both sizes and the encode time, or
+    None if the file could not be compressed.
     """
     print("\n" + "_" * 100)
     print(f"Processing: {input_path.name}")
@@ -250,45 +346,81 @@ def process_video(input_path: Path):
         orig_size = input_path.stat().st_size
     except FileNotFoundError:
         print(f"  [Error] File not found: {input_path}")
-        return
-
-    # Build unique temp filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_filename = f"{input_path.stem}_{timestamp}.mp4"
-    temp_path = Path(temp_filename)
-
-    # Build a log file name
-    log_filename = f"{input_path.stem}_{timestamp}.log"
-    log_path = Path(log_filename)
+        return None
+
+    # Create a unique temp file. It is written inside output/ under a
+    # .partial suffix, so the final move is a rename within one directory
+    # and an interrupted encode never looks like a finished one. mkstemp
+    # creates the name atomically, so parallel jobs (or a second copy of the
+    # script) can never pick the same one; ffmpeg -y then overwrites it.
+    fd, temp_name = tempfile.mkstemp(suffix=".mp4.partial", prefix=f"{input_path.stem}_", dir=DIR_OUTPUT)
+    os.fchmod(fd, OUTPUT_MODE)
+    os.close(fd)
+    temp_path = Path(temp_name)
 
     # Assemble ffmpeg command
     cmd = [
         FFMPEG_CMD,
         "-hide_banner",
         "-loglevel", "info",
-        "-report",
+        "-nostats",
+        "-progress", "pipe:1",
         "-y",
         "-i", str(input_path),
         *VIDEO_OPTIONS,
         *METADATA_OPTIONS,
+        "-f", "mp4",  # the .partial suffix hides the container from ffmpeg
         str(temp_path)
     ]
 
-    # Run ffmpeg, logging stdout/stderr into our custom log file
-    with log_path.open("wb") as lf:
-        start = time.perf_counter()
-        result = subprocess.run(cmd, stdout=lf, stderr=subprocess.STDOUT)
-        elapsed = time.perf_counter() - start
-
-    if result.returncode != 0:
-        print(f"  [FFmpeg Error] exited with code {result.returncode}. Check log: {log_path}")
-        # Optionally show first few lines:
-        with log_path.open("r", errors="ignore") as lf:
-            for i, line in enumerate(lf):
-                if i >= 5:
-                    break
-                print(f"    {line.rstrip()}")
-        return
+    # ffmpeg's messages (stderr) are kept only as a bounded in-memory tail that
+    # is written to the log file if the encode fails, plus, for --fast-compare,
+    # the "Input #0" banner describing the original. Structured progress
+    # (stdout, -progress pipe:1) drives a one-line status on a terminal.
+    tail = deque(maxlen=200)
+    input_banner = []
+
+    def drain_stderr(stream):
+        in_banner = fast_compare
+        for line in stream:
+            tail.append(line)
+            if in_banner:
+                if line.startswith((b"Output #", b"Stream mapping")) or len(input_banner) >= 200:
+                    in_banner = False
+                else:
+                    input_banner.append(line.decode(errors="ignore"))
+        stream.close()
+
+    show_progress = sys.stdout.isatty()
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    reader = threading.Thread(target=drain_stderr, args=(proc.stderr,), daemon=True)
+    reader.start()
+    progress = {}
+    for line in proc.stdout:
+        key, _, value = line.decode(errors="ignore").strip().partition("=")
+        progress[key] = value
+        if key == "progress" and show_progress:
+            encoded = progress.get("out_time", "")[:8]
+            print(f"\r  … {encoded} encoded, speed {progress.get('speed', '?').strip()}",
+                  end="", flush=True)
+    proc.stdout.close()
+    returncode = proc.wait()
+    reader.join()
+    elapsed = time.perf_counter() - start
+    if show_progress:
+        print()
+
+    if returncode != 0:
+        fd, log_name = tempfile.mkstemp(suffix=".log", prefix=f"{input_path.stem}_", dir=".")
+        with os.fdopen(fd, "wb") as log_file:
+            log_file.writelines(tail)
+        log_path = Path(log_name)
+        temp_path.unlink(missing_ok=True)
+        print(f"  [FFmpeg Error] exited with code {returncode}. Check log: {log_path}")
+        for line in list(tail)[-5:]:
+            print(f"    {line.decode(errors='ignore').rstrip()}")
+        return None
 
     # 2) Report timing and size info
     print(f"  → Compression completed in {elapsed:.1f} sec")
@@ -298,50 +430,87 @@ def process_video(input_path: Path):
         comp_size = temp_path.stat().st_size
     except FileNotFoundError:
         print(f"  [Error] Compressed file not found: {temp_path}")
-        return
+        return None
 
     print(f"  • Compressed size: {human_readable_size(comp_size)}")
 
     # 3) Run ffprobe comparison
-    print_comparison(input_path, temp_path)
+    orig_sum = summary_from_ffmpeg_log(input_banner, orig_size) if fast_compare else None
+    print_comparison(input_path, temp_path, orig_sum)
 
     # 4) Move files:
     target_over = DIR_OVER / input_path.name
-    if target_over.exists():
-        target_over.unlink()
-    shutil.move(str(input_path), str(target_over))
+    move_replacing(input_path, target_over)
     print(f"  ✔ Moved original to: {target_over}")
 
     final_name = f"{input_path.stem}.mp4"
     target_out = DIR_OUTPUT / final_name
-    if target_out.exists():
-        target_out.unlink()
-    shutil.move(str(temp_path), str(target_out))
+    move_replacing(temp_path, target_out)
     print(f"  ✔ Moved compressed to: {target_out}")
 
+    return {
+        "name": input_path.name,
+        "orig_size": orig_size,
+        "comp_size": comp_size,
+        "elapsed": elapsed,
+    }
+
+
+def process_video_buffered(input_path: Path, fast_compare: bool = False):
+    """
+    Worker-process entry point: run process_video() with its output captured,
+    so parallel jobs print whole reports instead of interleaved lines.
+    Returns (report_text, result).
+    """
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        result = process_video(input_path, fast_compare=fast_compare)
+    return buf.getvalue(), result
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Compress every video in the current directory to AV1 and compare.")
+    parser.add_argument("--fast-compare", action="store_true",
+                        help="read the original's metadata from ffmpeg's output instead of running ffprobe on it")
+    args = parser.parse_args()
+
     # Ensure folders exist
     DIR_OVER.mkdir(exist_ok=True)
     DIR_OUTPUT.mkdir(exist_ok=True)
 
-    cwd = Path.cwd()
-    video_files = []
-
-    # Gather all extensions (case-insensitive)
-    for ext in VIDEO_EXTENSIONS:
-        video_files.extend(cwd.glob(f"*{ext}"))
-        video_files.extend(cwd.glob(f"*{ext.upper()}"))
+    # One pass over the directory, matching extensions case-insensitively
+    with os.scandir(Path.cwd()) as it:
+        video_files = [Path(e.path) for e in it
+                       if e.is_file() and e.name.lower().endswith(EXT_TUPLE)]
 
     if not video_files:
         print("No video files found.")
         return
 
     video_files = sorted(video_files)
-
-    for idx, vid in enumerate(video_files, start=1):
-        print(f"\n>>> ({idx}/{len(video_files)})")
-        process_video(vid)
+    jobs = max(1, min(len(video_files), (os.cpu_count() or 1) // THREADS_PER_JOB))
+
+    results = []
+    if jobs == 1:
+        for idx, vid in enumerate(video_files, start=1):
+            print(f"\n>>> ({idx}/{len(video_files)})")
+            results.append(process_video(vid, fast_compare=args.fast_compare))
+    else:
+        print(f"Encoding {len(video_files)} file(s), {jobs} at a time × {THREADS_PER_JOB} threads")
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            futures = [ex.submit(process_video_buffered, vid, args.fast_compare) for vid in video_files]
+            for idx, fut in enumerate(as_completed(futures), start=1):
+                report, result = fut.result()
+                print(f"\n>>> ({idx}/{len(video_files)})")
+                print(report, end="")
+                results.append(result)
+
+    done = [r for r in results if r]
+    if done:
+        orig_total = sum(r["orig_size"] for r in done)
+        comp_total = sum(r["comp_size"] for r in done)
+        print(f"\nCompressed {len(done)}/{len(video_files)} file(s): "
+              f"{human_readable_size(orig_total)} → {human_readable_size(comp_total)}")
 
     print("\n" + "_" * 60)
     print("Batch job completed at:", datetime.now().strftime("%d/%m/%Y %H:%M:%S"))
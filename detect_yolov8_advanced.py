@@ -7,6 +7,7 @@ from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 from datetime import datetime
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 def delete_cache(path: Path):
     if path.exists():
@@ -15,31 +16,83 @@ def delete_cache(path: Path):
         elif path.is_dir():
             shutil.rmtree(path)
 
-def process_image(model, image_path: Path, shared_output_dir: Path, flat_crop_dir: Path, detections_accumulator=None):
+FICLONE = 0x40049409  # Linux ioctl: share extents (btrfs/XFS reflink)
+
+def _fast_copy(src: Path, dst: Path):
+    # Crops are written once and never modified, so a hard link (or a
+    # copy-on-write clone) is as good as a copy and moves no data.
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    try:
+        import fcntl
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+    shutil.copy(src, dst)
+
+def process_image(model, image_path: Path, shared_output_dir: Path, flat_crop_dir: Path, detections_accumulator=None, predict_opts=None, copy_pool=None):
     results = model.predict(
         source=str(image_path),
         save=True,
         project=str(shared_output_dir.parent),
         name=shared_output_dir.name,
         exist_ok=True,
-        save_crop=True
+        save_crop=True,
+        **(predict_opts or {})
     )
+    return collect_detections(model, results, shared_output_dir, flat_crop_dir, detections_accumulator, copy_pool)
 
+def process_images(model, image_paths, shared_output_dir: Path, flat_crop_dir: Path, detections_accumulator=None, batch=16, predict_opts=None, copy_pool=None):
+    # One predict() call for the whole folder lets Ultralytics fill real
+    # batches instead of running the model on one image at a time.
+    results = model.predict(
+        source=[str(p) for p in image_paths],
+        stream=True,
+        batch=batch,
+        save=True,
+        project=str(shared_output_dir.parent),
+        name=shared_output_dir.name,
+        exist_ok=True,
+        save_crop=True,
+        **(predict_opts or {})
+    )
+    return collect_detections(model, results, shared_output_dir, flat_crop_dir, detections_accumulator, copy_pool)
+
+def collect_detections(model, results, shared_output_dir: Path, flat_crop_dir: Path, detections_accumulator=None, copy_pool=None):
+    # With a copy_pool the crop copies drain in the background while the
+    # next results are processed; the returned futures must be waited on.
+    copies = []
     for r in results:
+        image_path = Path(r.path)
+        # The crops of this image are on disk once its result is returned;
+        # list each class folder once rather than once per box
+        crops_by_class = {}
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         for i, box in enumerate(r.boxes):
             cls_id = int(box.cls)
             cls_name = model.names[cls_id]
             conf = box.conf.item()
             xyxy = [round(x, 2) for x in box.xyxy.tolist()[0]]
 
-            crop_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{cls_name}_{i+1}.jpg"
+            # The image stem keeps crops of images handled in the same second apart
+            crop_name = f"{ts}_{image_path.stem}_{cls_name}_{i+1}.jpg"
             crop_dir = shared_output_dir / "crops" / cls_name
-            crop_file_candidates = list(crop_dir.glob("*.jpg"))
+            crop_file_candidates = crops_by_class.get(cls_name)
+            if crop_file_candidates is None:
+                crop_file_candidates = crops_by_class[cls_name] = list(crop_dir.glob("*.jpg"))
             crop_file = crop_file_candidates[i] if i < len(crop_file_candidates) else None
 
             flat_crop_path = flat_crop_dir / crop_name
             if crop_file and crop_file.is_file():
-                shutil.copy(crop_file, flat_crop_path)
+                if copy_pool is not None:
+                    copies.append(copy_pool.submit(_fast_copy, crop_file, flat_crop_path))
+                else:
+                    _fast_copy(crop_file, flat_crop_path)
 
             if detections_accumulator is not None:
                 detections_accumulator.append({
@@ -49,26 +102,36 @@ def process_image(model, image_path: Path, shared_output_dir: Path, flat_crop_di
                     "box": xyxy,
                     "flat_crop_path": str(flat_crop_path)
                 })
+    return copies
 
 def export_to_excel(detections, output_path):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Detections"
+    # Write-only mode streams rows to disk instead of keeping a cell object
+    # per value; column widths are therefore worked out from the plain rows
+    # up front, since a write-only sheet emits them before its first row.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Detections")
     headers = ["Filename", "Class", "Confidence (%)", "Box x1", "Box y1", "Box x2", "Box y2", "Flat Crop Path"]
-    ws.append(headers)
 
-    for det in detections:
-        ws.append([
+    rows = [
+        [
             det["file"],
             det["class"],
             round(det["confidence"] * 100, 2),
             *det["box"],
             det.get("flat_crop_path", "")
-        ])
+        ]
+        for det in detections
+    ]
 
-    for col in ws.columns:
-        max_len = max(len(str(cell.value)) for cell in col)
-        ws.column_dimensions[get_column_letter(col[0].column)].width = max_len + 2
+    col_max = [len(h) for h in headers]
+    for row in rows:
+        col_max = [max(w, len(str(v))) for w, v in zip(col_max, row)]
+    for idx, width in enumerate(col_max, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width + 2
+
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
 
     wb.save(output_path)
 
@@ -78,7 +141,9 @@ def main():
     group.add_argument('--image', type=str, help="Path to a single image")
     group.add_argument('--folder', type=str, help="Path to folder of images")
     group.add_argument('--video', type=str, help="Path to video file")
-    parser.add_argument('--model', type=str, default="yolov8x.pt", help="YOLOv8 model to use")
+    parser.add_argument('--model', type=str, default="yolov8x.pt", help="YOLOv8 model to use (.pt, or an exported .engine)")
+    parser.add_argument('--device', type=str, default=None, help="Inference device, e.g. 0 or cpu (default: auto)")
+    parser.add_argument('--half', action='store_true', help="Run FP16 inference (CUDA only)")
     args = parser.parse_args()
 
     model = YOLO(args.model)
@@ -88,21 +153,28 @@ def main():
     shared_output_dir.mkdir(parents=True, exist_ok=True)
     flat_crop_dir.mkdir(parents=True, exist_ok=True)
     detections_log = []
+    predict_opts = {"half": args.half}
+    if args.device is not None:
+        predict_opts["device"] = args.device
 
     if args.image:
         image_path = Path(args.image)
         if not image_path.is_file():
             print(f"Error: Image {image_path} not found.")
             sys.exit(1)
-        process_image(model, image_path, shared_output_dir, flat_crop_dir, detections_accumulator=detections_log)
+        process_image(model, image_path, shared_output_dir, flat_crop_dir, detections_accumulator=detections_log, predict_opts=predict_opts)
 
     elif args.folder:
         folder_path = Path(args.folder)
         if not folder_path.is_dir():
             print(f"Error: Folder {folder_path} not found.")
             sys.exit(1)
-        for img_file in folder_path.glob("*.[jp][pn]g"):
-            process_image(model, img_file, shared_output_dir, flat_crop_dir, detections_accumulator=detections_log)
+        img_files = sorted(folder_path.glob("*.[jp][pn]g"))
+        if img_files:
+            with ThreadPoolExecutor(max_workers=8) as copy_pool:
+                copies = process_images(model, img_files, shared_output_dir, flat_crop_dir, detections_accumulator=detections_log, predict_opts=predict_opts, copy_pool=copy_pool)
+                for copy in copies:
+                    copy.result()
 
     elif args.video:
         video_path = Path(args.video)
@@ -114,7 +186,8 @@ def main():
             save=True,
             project=str(shared_output_dir.parent),
             name=shared_output_dir.name,
-            exist_ok=True
+            exist_ok=True,
+            **predict_opts
         )
 
     if detections_log:
@@ -1,28 +1,37 @@
 #!/usr/bin/env python
- """Utilities for finding the optimum bitrate of videos with FFmpeg.
- 
- 
- Run ``python findOptimumBitrate.py --help`` for a full list of options.
- """
- 
+"""Utilities for finding the optimum bitrate of videos with FFmpeg.
+
+
+Run ``python findOptimumBitrate.py --help`` for a full list of options.
+"""
+
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import math
 import os
+import queue
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from os import PathLike
-from typing import Any, Iterable, Mapping, MutableMapping, Sequence, TypeAlias
+from typing import Any, Iterable, Literal, Mapping, MutableMapping, Sequence, TypeAlias
+
+try:  # optional, several times faster on large ffprobe payloads
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
 
 Pathish: TypeAlias = str | PathLike[str] | Path
 
 __all__ = [
     "AnalysisConfig",
     "AnalysisResult",
+    "FfprobeWorker",
     "Pathish",
     "VideoStream",
     "VideoProbe",
@@ -38,12 +47,22 @@ __all__ = [
     "recommend_bitrate",
     "request",
     "run_ffprobe",
+    "run_pyav_probe",
+    "write_json_report",
 ]
 
 __author__ = "Pradeep Antapnal"
 VERSION = "1.1.0"
 
 
+def _json_loads(data: str | bytes) -> Any:
+    """Decode JSON with :mod:`orjson` when it is installed."""
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def request(command: Sequence[str], *, check: bool = False) -> subprocess.CompletedProcess[str]:
     """Execute ``command`` and return the completed process.
 
@@ -92,22 +111,23 @@ class VideoProbe:
         return (self.size_bytes * 8) / self.duration
 
 
+@functools.lru_cache(maxsize=64)
 def parse_fraction(value: str | None) -> float | None:
     """Convert an ffprobe rational value (``"30000/1001"``) to ``float``."""
 
     if not value:
         return None
-    if value.isdigit():
-        return float(value)
-    if "/" not in value:
-        try:
+    idx = value.find("/")
+    try:
+        if idx < 0:
             return float(value)
+        try:
+            # ffprobe almost always reports "<int>/<int>"; int parsing is exact.
+            num: float = int(value[:idx])
+            den: float = int(value[idx + 1 :])
         except ValueError:
-            return None
-    numerator, denominator = value.split("/", 1)
-    try:
-        num = float(numerator)
-        den = float(denominator)
+            num = float(value[:idx])
+            den = float(value[idx + 1 :])
     except ValueError:
         return None
     if den == 0:
@@ -200,14 +220,146 @@ def run_ffprobe(path: Pathish, ffprobe_cmd: str = "ffprobe") -> VideoProbe:
     if result.returncode != 0:
         raise RuntimeError(result.stderr.strip() or "ffprobe failed")
     try:
-        payload = json.loads(result.stdout or "{}")
-    except json.JSONDecodeError as exc:  # pragma: no cover - defensive
+        payload = _json_loads(result.stdout or "{}")
+    except ValueError as exc:  # pragma: no cover - defensive
         raise RuntimeError("Invalid ffprobe output") from exc
     if not isinstance(payload, MutableMapping):
         raise RuntimeError("Unexpected ffprobe payload")
     return parse_ffprobe_output(Path(path), payload)
 
 
+class FfprobeWorker:
+    """Long-lived shell that runs ffprobe for each path written to its stdin.
+
+    Python only pays for spawning the helper once; each request is a line on
+    the pipe and the answer is the ffprobe JSON followed by an ``__END__``
+    marker carrying the exit status.  Use it as a context manager so the
+    helper is shut down when the batch is finished.
+
+    ffprobe's stdin is ``/dev/null`` so an input named ``-`` or ``pipe:0``
+    cannot swallow the request pipe, and the pipes use ``surrogateescape`` so
+    file names that are not valid UTF-8 round-trip as the original bytes.
+    """
+
+    _SCRIPT = (
+        'while IFS= read -r p; do '
+        '"$1" -v quiet -print_format json -show_format -show_streams "$p" </dev/null; '
+        'echo "__END__ $?"; '
+        "done"
+    )
+
+    def __init__(self, ffprobe_cmd: str = "ffprobe") -> None:
+        self.ffprobe_cmd = ffprobe_cmd
+        self._process: subprocess.Popen[str] | None = None
+
+    def __enter__(self) -> "FfprobeWorker":
+        self._process = subprocess.Popen(
+            ["sh", "-c", self._SCRIPT, "sh", self.ffprobe_cmd],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="surrogateescape",
+        )
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.stdin is not None:
+            process.stdin.close()
+        process.wait()
+        if process.stdout is not None:
+            process.stdout.close()
+
+    def probe(self, path: Pathish) -> VideoProbe:
+        """Probe *path* through the running helper."""
+
+        process = self._process
+        if process is None or process.stdin is None or process.stdout is None:
+            raise RuntimeError("FfprobeWorker is not running")
+        name = os.fspath(path)
+        if "\n" in name:
+            # The line protocol cannot carry this name; fall back to a one-off ffprobe.
+            return run_ffprobe(path, ffprobe_cmd=self.ffprobe_cmd)
+
+        process.stdin.write(name + "\n")
+        process.stdin.flush()
+        buffer: list[str] = []
+        status = None
+        for line in process.stdout:
+            if line.startswith("__END__"):
+                status = line.split()[-1]
+                break
+            buffer.append(line)
+        if status is None:
+            raise RuntimeError("ffprobe worker exited unexpectedly")
+        if status != "0":
+            raise RuntimeError("ffprobe failed")
+        text = "".join(buffer) or "{}"
+        try:
+            try:
+                payload = _json_loads(text)
+            except ValueError:
+                # orjson rejects the escaped bytes of a non-UTF-8 file name; json does not
+                payload = json.loads(text)
+        except ValueError as exc:  # pragma: no cover - defensive
+            raise RuntimeError("Invalid ffprobe output") from exc
+        if not isinstance(payload, MutableMapping):
+            raise RuntimeError("Unexpected ffprobe payload")
+        return parse_ffprobe_output(Path(path), payload)
+
+
+def run_pyav_probe(path: Pathish) -> VideoProbe:
+    """Read the same metadata as :func:`run_ffprobe` in-process with PyAV.
+
+    Opening the container through libavformat directly avoids spawning an
+    ffprobe process and parsing its JSON for every file.  Requires the
+    optional ``av`` package.
+    """
+
+    try:
+        import av
+    except ImportError as exc:
+        raise RuntimeError("The pyav backend requires the 'av' package") from exc
+
+    path = Path(path)
+    try:
+        container = av.open(str(path))
+    except getattr(av, "FFmpegError", getattr(av, "AVError", OSError)) as exc:
+        raise RuntimeError(str(exc)) from exc
+    with container:
+        duration = container.duration / av.time_base if container.duration else None
+        size_bytes = _safe_int(getattr(container, "size", None))
+        format_bitrate = _safe_int(container.bit_rate) or None
+        video_stream: VideoStream | None = None
+        for stream in container.streams.video:
+            ctx = stream.codec_context
+            if not ctx.width or not ctx.height:
+                continue
+            rate = stream.average_rate
+            video_stream = VideoStream(
+                width=ctx.width,
+                height=ctx.height,
+                codec=ctx.name,
+                fps=float(rate) if rate else None,
+                bitrate=_safe_int(stream.bit_rate) or None,
+            )
+            break
+
+    return VideoProbe(
+        path=path,
+        duration=duration,
+        size_bytes=size_bytes,
+        format_bitrate=format_bitrate,
+        video=video_stream,
+    )
+
+
 def bitrate_from_bits_per_pixel(
     width: int,
     height: int,
@@ -222,6 +374,17 @@ def bitrate_from_bits_per_pixel(
         raise ValueError("Frame rate must be positive")
     if bits_per_pixel <= 0:
         raise ValueError("bits_per_pixel must be positive")
+    return _bbp_cached(width, height, fps, bits_per_pixel)
+
+
+@functools.lru_cache(maxsize=1024)
+def _bbp_cached(width: int, height: int, fps: float, bits_per_pixel: float) -> int:
+    """Memoised core of :func:`bitrate_from_bits_per_pixel`.
+
+    Batches from a single camera repeat the same shape over and over, so the
+    result is looked up rather than recomputed.
+    """
+
     return math.ceil(width * height * fps * bits_per_pixel)
 
 
@@ -293,6 +456,8 @@ class AnalysisConfig:
     minimum: int | None = None
     maximum: int | None = None
     ffprobe: str = field(default_factory=lambda: os.environ.get("FFPROBE", "ffprobe"))
+    workers: int = 8
+    backend: Literal["ffprobe", "ffprobe-worker", "pyav"] = "ffprobe"
 
 
 @dataclass(slots=True)
@@ -329,15 +494,55 @@ def analyse_paths(
     paths: Iterable[Pathish],
     config: AnalysisConfig | None = None,
 ) -> list[AnalysisResult]:
-    """Run ``ffprobe`` on *paths* and build a structured report."""
+    """Run ``ffprobe`` on *paths* and build a structured report.
+
+    The probes run concurrently on ``config.workers`` threads (each one just
+    waits on its ffprobe child); results keep the order of *paths*.  A file
+    that ffprobe cannot read is reported with an ``error`` instead of
+    aborting the whole batch.
+    """
 
     if config is None:
         config = AnalysisConfig()
 
-    resolved_paths = [Path(p) for p in paths]
+    # Plain strings until a probe needs a Path; VideoProbe builds the one it keeps.
+    raw_paths = [os.fspath(p) for p in paths]
     results: list[AnalysisResult] = []
-    for path in resolved_paths:
-        probe = run_ffprobe(path, ffprobe_cmd=config.ffprobe)
+    workers = max(1, min(config.workers, len(raw_paths)))
+    ffprobe_workers: queue.SimpleQueue[FfprobeWorker] = queue.SimpleQueue()
+    started: list[FfprobeWorker] = []
+
+    def probe_with_worker(path: str) -> VideoProbe:
+        # Each thread borrows a helper for the duration of one probe.
+        worker = ffprobe_workers.get()
+        try:
+            return worker.probe(path)
+        finally:
+            ffprobe_workers.put(worker)
+
+    try:
+        if config.backend == "ffprobe-worker":
+            for _ in range(workers):
+                worker = FfprobeWorker(config.ffprobe).__enter__()
+                started.append(worker)
+                ffprobe_workers.put(worker)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            if config.backend == "pyav":
+                futures = [pool.submit(run_pyav_probe, path) for path in raw_paths]
+            elif config.backend == "ffprobe-worker":
+                futures = [pool.submit(probe_with_worker, path) for path in raw_paths]
+            else:
+                futures = [pool.submit(run_ffprobe, path, ffprobe_cmd=config.ffprobe) for path in raw_paths]
+    finally:
+        for worker in started:
+            worker.close()
+    for path, future in zip(raw_paths, futures):
+        try:
+            probe = future.result()
+        except RuntimeError as exc:
+            empty = VideoProbe(path=Path(path), duration=None, size_bytes=None, format_bitrate=None, video=None)
+            results.append(AnalysisResult(probe=empty, recommendation=None, error=str(exc)))
+            continue
         try:
             recommendation = recommend_bitrate(
                 probe,
@@ -373,6 +578,15 @@ def parse_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=defaults.ffprobe,
         help="ffprobe executable to invoke",
     )
+    parser.add_argument(
+        "--backend",
+        choices=("ffprobe", "ffprobe-worker", "pyav"),
+        default=defaults.backend,
+        help=(
+            "Read metadata with one ffprobe process per file, through long-lived "
+            "ffprobe helper shells, or in-process with PyAV (default: %(default)s)"
+        ),
+    )
     parser.add_argument(
         "--target-bpp",
         type=float,
@@ -397,6 +611,12 @@ def parse_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=None,
         help="Clamp recommendations to be at most this bitrate (bps)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=defaults.workers,
+        help="Number of ffprobe processes to run at once (default: %(default)s)",
+    )
     parser.add_argument(
         "--json",
         action="store_true",
@@ -405,6 +625,28 @@ def parse_arguments(argv: Sequence[str] | None = None) -> argparse.Namespace:
     return parser.parse_args(argv)
 
 
+def write_json_report(report: Iterable[AnalysisResult]) -> None:
+    """Stream *report* to stdout as a JSON array, one element at a time.
+
+    Each result is serialised on its own (with :mod:`orjson` straight to the
+    binary buffer when available) so no list of dictionaries is built first.
+    """
+
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+    out.write(b"[")
+    separator = b"\n"
+    for item in report:
+        out.write(separator)
+        separator = b",\n"
+        if orjson is not None:
+            out.write(orjson.dumps(item.to_dict(), option=orjson.OPT_INDENT_2))
+        else:
+            out.write(json.dumps(item.to_dict(), indent=2).encode())
+    out.write(b"]\n" if separator == b"\n" else b"\n]\n")
+    out.flush()
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     args = parse_arguments(argv)
     config = AnalysisConfig(
@@ -413,24 +655,25 @@ def main(argv: Sequence[str] | None = None) -> int:
         minimum=args.minimum,
         maximum=args.maximum,
         ffprobe=args.ffprobe,
+        workers=args.workers,
+        backend=args.backend,
     )
     report = analyse_paths(args.paths, config=config)
 
     if args.json:
-        json.dump([item.to_dict() for item in report], sys.stdout, indent=2)
-        sys.stdout.write("\n")
+        write_json_report(report)
         return 0
 
     for item in report:
-        data = item.to_dict()
-        print(data["path"])
-        video = data["video"]
-        if data.get("duration") is not None:
-            print(f"  Duration: {data['duration']:.2f} s")
-        if video.get("width") and video.get("height"):
-            print(f"  Resolution: {video['width']}x{video['height']}")
-        if video.get("fps"):
-            print(f"  Frame rate: {video['fps']:.2f} fps")
+        probe = item.probe
+        print(probe.path)
+        video = probe.video
+        if probe.duration is not None:
+            print(f"  Duration: {probe.duration:.2f} s")
+        if video is not None and video.width and video.height:
+            print(f"  Resolution: {video.width}x{video.height}")
+        if video is not None and video.fps:
+            print(f"  Frame rate: {video.fps:.2f} fps")
         if item.recommendation is not None:
             formatted = format_bitrate(int(item.recommendation))
             print(f"  Recommended bitrate: {formatted}")
@@ -12,6 +12,8 @@ to offer a friendlier command line experience and more customisation:
 * Skip files that already have a compressed counterpart.
 * Keep FFmpeg logs for later inspection or discard them automatically.
 * Perform dry runs to preview the work that would be carried out.
+* Encode several files at once on machines with cores to spare.
+* Pass through inputs that are already AV1 instead of re-encoding them.
 
 Run ``python gpt_video_compress.py --help`` for a full list of options.
 """
@@ -19,15 +21,22 @@ Run ``python gpt_video_compress.py --help`` for a full list of options.
 from __future__ import annotations
 
 import argparse
+import errno
+import json
 import logging
+import os
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Dict, Iterable, Iterator, List, Sequence
 
 LOG_FORMAT = "%(levelname)s: %(message)s"
 DEFAULT_VIDEO_EXTENSIONS: tuple[str, ...] = (
@@ -43,6 +52,9 @@ DEFAULT_VIDEO_EXTENSIONS: tuple[str, ...] = (
     ".vob",
     ".webm",
 )
+DEFAULT_PROBE_CACHE = Path(".pradeep_probe_cache.json")
+# Lines of FFmpeg output kept in memory (and written on failure) without --keep-logs.
+LOG_TAIL_LINES = 200
 
 
 @dataclass(slots=True)
@@ -50,8 +62,10 @@ class CompressionConfig:
     """Container for user-configurable settings."""
 
     ffmpeg_cmd: str = "ffmpeg"
+    ffprobe_cmd: str = "ffprobe"
     threads: int = 8
     crf: int = 22
+    video_bitrate: str | None = None
     gop: int = 240
     svt_params: str = "tune=0:enable-overlays=1:scd=1"
     pix_fmt: str = "yuv420p10le"
@@ -66,22 +80,29 @@ class CompressionConfig:
     dry_run: bool = False
     skip_existing: bool = False
     move_originals: bool = True
+    jobs: int = 1
+    probe_cache_path: Path | None = DEFAULT_PROBE_CACHE
+    _ext_tuple: tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Lower-cased once so discovery can match names with a single str.endswith.
+        self._ext_tuple = tuple(ext.lower() for ext in self.video_extensions)
 
     def normalised_extensions(self) -> List[str]:
         """Return file extensions normalised to lower-case."""
 
-        return [ext.lower() for ext in self.video_extensions]
+        return list(self._ext_tuple)
 
     def video_options(self) -> List[str]:
         """Build FFmpeg arguments for video encoding."""
 
+        rate_control = ["-b:v", self.video_bitrate] if self.video_bitrate else ["-crf", str(self.crf)]
         return [
             "-c:v",
             "libsvtav1",
             "-threads",
             str(self.threads),
-            "-crf",
-            str(self.crf),
+            *rate_control,
             "-g",
             str(self.gop),
             "-svtav1-params",
@@ -102,24 +123,124 @@ class CompressionConfig:
 
 @dataclass(slots=True)
 class CompressionStats:
-    """Simple aggregation of script results."""
+    """Simple aggregation of script results.
+
+    The ``record_*`` methods are safe to call from several worker threads.
+    """
 
     processed: int = 0
     skipped: int = 0
     failures: int = 0
     bytes_before: int = 0
     bytes_after: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
     def record_processed(self, original: int, compressed: int) -> None:
-        self.processed += 1
-        self.bytes_before += original
-        self.bytes_after += compressed
+        with self._lock:
+            self.processed += 1
+            self.bytes_before += original
+            self.bytes_after += compressed
 
     def record_skipped(self) -> None:
-        self.skipped += 1
+        with self._lock:
+            self.skipped += 1
 
     def record_failure(self) -> None:
-        self.failures += 1
+        with self._lock:
+            self.failures += 1
+
+
+@dataclass(slots=True)
+class ProbeCache:
+    """Video codec names from earlier runs, keyed by file name, size and mtime.
+
+    The directory is left out of the key on purpose: originals are moved to
+    ``originals_dir`` and AV1 inputs to ``output_dir`` (both keep name and
+    mtime), so a later run over either directory still finds them. A file
+    that changes on disk gets a new key, so stale entries are never returned;
+    they are simply left behind until the cache file is deleted.
+    """
+
+    path: Path
+    entries: Dict[str, str] = field(default_factory=dict)
+    dirty: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "ProbeCache":
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                entries = json.load(handle)
+        except (OSError, ValueError):
+            entries = {}
+        return cls(path, entries if isinstance(entries, dict) else {})
+
+    @staticmethod
+    def key(video: Path) -> str:
+        st = video.stat()
+        return f"{video.name}|{st.st_size}|{st.st_mtime_ns}"
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            return self.entries.get(key)
+
+    def put(self, key: str, codec: str) -> None:
+        with self._lock:
+            self.entries[key] = codec
+            self.dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self.dirty:
+                return
+            temp = self.path.with_name(self.path.name + ".tmp")
+            temp.write_text(json.dumps(self.entries), encoding="utf-8")
+            os.replace(temp, self.path)
+            self.dirty = False
+
+
+def probe_video_codec(
+    path: Path, config: CompressionConfig, cache: ProbeCache | None = None
+) -> str | None:
+    """Return the codec name of the first video stream, or ``None`` if unknown."""
+
+    key = ProbeCache.key(path) if cache else ""
+    codec = cache.get(key) if cache else None
+    if codec is not None:
+        return codec
+
+    cmd = [
+        config.ffprobe_cmd,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "stream=codec_name",
+        "-of",
+        "csv=p=0",
+        str(path),
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    except OSError as exc:
+        logging.warning("Could not run %s: %s", config.ffprobe_cmd, exc)
+        return None
+    codec = result.stdout.strip().lower()
+    if result.returncode != 0 or not codec:
+        return None
+
+    if cache:
+        cache.put(key, codec)
+    return codec
+
+
+def needs_reencode(
+    path: Path, config: CompressionConfig, cache: ProbeCache | None = None
+) -> bool:
+    """Return ``False`` only when ``path`` is known to hold AV1 video already."""
+
+    return probe_video_codec(path, config, cache) != "av1"
 
 
 def human_readable_size(bytes_size: int) -> str:
@@ -133,8 +254,13 @@ def build_ffmpeg_command(
     input_path: Path,
     output_path: Path,
     config: CompressionConfig,
+    extra_args: Sequence[str] = (),
 ) -> List[str]:
-    """Construct the FFmpeg command for a single video."""
+    """Construct the FFmpeg command for a single video.
+
+    *extra_args* are placed just before the output path (used for the
+    two-pass options).
+    """
 
     return [
         config.ffmpeg_cmd,
@@ -146,56 +272,215 @@ def build_ffmpeg_command(
         str(input_path),
         *config.video_options(),
         *config.metadata_options(),
+        *extra_args,
         str(output_path),
     ]
 
 
-def discover_video_files(paths: Iterable[Path], config: CompressionConfig) -> List[Path]:
-    """Collect all video files from *paths* according to *config*."""
+def build_two_pass_commands(
+    input_path: Path,
+    output_path: Path,
+    config: CompressionConfig,
+    passlog: Path,
+) -> List[List[str]]:
+    """Return the analysis and encode commands for a two-pass VBR encode."""
+
+    first = [
+        config.ffmpeg_cmd,
+        "-hide_banner",
+        "-loglevel",
+        "info",
+        "-y",
+        "-i",
+        str(input_path),
+        *config.video_options(),
+        "-pass",
+        "1",
+        "-passlogfile",
+        str(passlog),
+        "-an",
+        "-f",
+        "null",
+        "-",
+    ]
+    second = build_ffmpeg_command(
+        input_path,
+        output_path,
+        config,
+        ["-pass", "2", "-passlogfile", str(passlog)],
+    )
+    return [first, second]
+
+
+def _run_ffmpeg(cmd: Sequence[str], log_path: Path, keep_logs: bool) -> int:
+    """Run one FFmpeg command and return its exit code.
+
+    With *keep_logs* the output is appended to *log_path*; otherwise only the
+    last :data:`LOG_TAIL_LINES` lines are held in memory and written out if
+    FFmpeg fails.  The ``\r``-separated progress updates count as lines, so
+    memory stays bounded however long the encode runs.
+    """
+
+    if keep_logs:
+        with log_path.open("ab") as logfile:
+            return subprocess.run(cmd, stdout=logfile, stderr=subprocess.STDOUT).returncode
+
+    tail: deque[bytes] = deque(maxlen=LOG_TAIL_LINES)
+    partial = b""
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT) as process:
+        assert process.stdout is not None
+        for chunk in iter(lambda: process.stdout.read1(65536), b""):
+            lines = (partial + chunk).replace(b"\r", b"\n").split(b"\n")
+            partial = lines.pop()[-65536:]
+            tail.extend(line + b"\n" for line in lines if line)
+        returncode = process.wait()
+    if partial:
+        tail.append(partial)
+    if returncode != 0:
+        log_path.write_bytes(b"".join(tail))
+    return returncode
+
+
+def _walk_video_files(
+    dir_path: str,
+    exts: tuple[str, ...],
+    recursive: bool,
+    device: int,
+) -> Iterator[tuple[os.DirEntry[str], int]]:
+    """Yield ``(entry, st_dev)`` for files under *dir_path* ending in one of *exts*.
+
+    ``os.scandir`` entries carry their file type and inode from the directory
+    listing, so walking the tree costs one ``stat`` per directory rather than
+    one per file.
+    """
+
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            if entry.is_dir():
+                if recursive and not entry.is_symlink():
+                    child_device = entry.stat(follow_symlinks=False).st_dev
+                    yield from _walk_video_files(entry.path, exts, recursive, child_device)
+                continue
+            if entry.name.lower().endswith(exts):
+                yield entry, device
+
+
+def discover_video_files(paths: Iterable[Path], config: CompressionConfig) -> List[tuple[Path, int]]:
+    """Collect ``(path, size_in_bytes)`` for all video files in *paths*.
+
+    The size comes from the discovery ``stat`` so :func:`process_video` does
+    not need to stat the input again.  Files are deduplicated by
+    ``(st_dev, st_ino)``, which for regular files comes straight from the
+    directory listing.  Symlinks are resolved to their target, so the real
+    file is what gets moved, and a link is never processed alongside the file
+    it points to.
+    """
 
-    exts = set(config.normalised_extensions())
-    discovered: List[Path] = []
-    seen: set[Path] = set()
+    exts = config._ext_tuple
+    bases: List[Path] = []
     for base in paths:
         if not base.exists():
             logging.warning("Skipping missing path: %s", base)
             continue
+        bases.append(base)
+
+    discovered: List[tuple[Path, int]] = []
+    seen: set[tuple[int, int]] = set()
+    for base in bases:
+        base_stat = base.stat()
+        base_path = os.path.abspath(base)
 
         if base.is_file():
-            resolved = base.resolve()
-            if resolved.suffix.lower() in exts and resolved not in seen:
-                discovered.append(resolved)
-                seen.add(resolved)
+            if not base.name.lower().endswith(exts):
+                continue
+            key = (base_stat.st_dev, base_stat.st_ino)
+            if key not in seen:
+                seen.add(key)
+                path = base.resolve() if base.is_symlink() else Path(base_path)
+                discovered.append((path, base_stat.st_size))
             continue
 
-        iterator = base.rglob("*") if config.recursive else base.glob("*")
-        for candidate in iterator:
-            if candidate.is_dir():
+        for entry, device in _walk_video_files(base_path, exts, config.recursive, base_stat.st_dev):
+            if entry.is_symlink():
+                try:
+                    st = entry.stat()
+                except OSError:
+                    logging.warning("Skipping broken symlink: %s", entry.path)
+                    continue
+                key = (st.st_dev, st.st_ino)
+                path = Path(os.path.realpath(entry.path))
+            else:
+                st = entry.stat()
+                key = (device, entry.inode())
+                path = Path(entry.path)
+            if key in seen:
                 continue
-            resolved = candidate.resolve()
-            if resolved.suffix.lower() in exts and resolved not in seen:
-                discovered.append(resolved)
-                seen.add(resolved)
+            seen.add(key)
+            discovered.append((path, st.st_size))
 
     discovered.sort()
     return discovered
 
 
-def process_video(input_path: Path, config: CompressionConfig, stats: CompressionStats) -> None:
-    """Compress a single video file following ``config`` and update ``stats``."""
+def move_replacing(src: Path, dst: Path) -> None:
+    """Move *src* to *dst*, overwriting any existing file.
 
-    logging.info("Processing %s", input_path)
+    On one filesystem this is a single atomic ``rename``. A cross-device move
+    copies into a ``.partial`` file next to *dst* with :func:`shutil.copy2`
+    (which uses ``sendfile`` where available) and renames it into place, so
+    *dst* is never seen half-written.
+    """
 
     try:
-        orig_size_bytes = input_path.stat().st_size
-    except FileNotFoundError:
-        logging.error("File not found: %s", input_path)
-        stats.record_failure()
+        os.replace(src, dst)
         return
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+
+    partial = dst.with_name(dst.name + ".partial")
+    try:
+        shutil.copy2(src, partial)
+        os.replace(partial, dst)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.unlink(src)
+
+
+def prepare_directories(config: CompressionConfig) -> None:
+    """Create the output, originals and log directories used by :func:`process_video`.
+
+    Done once up front so parallel workers never race to create them.
+    """
 
     config.output_dir.mkdir(exist_ok=True, parents=True)
     if config.move_originals:
         config.originals_dir.mkdir(exist_ok=True, parents=True)
+    if config.keep_logs or not config.dry_run:
+        config.log_dir.mkdir(exist_ok=True, parents=True)
+
+
+def process_video(
+    input_path: Path,
+    orig_size_bytes: int,
+    config: CompressionConfig,
+    stats: CompressionStats,
+    session_ts: str,
+    index: int,
+    probe_cache: ProbeCache | None = None,
+) -> None:
+    """Compress a single video file following ``config`` and update ``stats``.
+
+    *orig_size_bytes* is the size recorded by :func:`discover_video_files`.
+    Temporary and log file names combine the run's *session_ts* with the
+    file's *index* in the batch, so they are unique without checking disk.
+    Inputs that are already AV1 are moved to the output directory unchanged
+    (or left in place with ``move_originals`` off) rather than re-encoded.
+    Expects the directories from :func:`prepare_directories` to exist.
+    """
+
+    logging.info("Processing %s", input_path)
 
     final_name = f"{input_path.stem}.mp4"
     target_out = config.output_dir / final_name
@@ -205,34 +490,54 @@ def process_video(input_path: Path, config: CompressionConfig, stats: Compressio
         stats.record_skipped()
         return
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_filename = f"{input_path.stem}_{timestamp}.mp4"
-    temp_path = (config.output_dir / temp_filename).resolve()
-    if temp_path.exists():
-        temp_path.unlink()
-
-    log_path = config.log_dir / f"{input_path.stem}_{timestamp}.log"
-    if config.keep_logs:
-        config.log_dir.mkdir(exist_ok=True, parents=True)
-
-    cmd = build_ffmpeg_command(input_path, temp_path, config)
+    try:
+        reencode = needs_reencode(input_path, config, probe_cache)
+    except OSError as exc:
+        # e.g. the file vanished after discovery
+        logging.error("Cannot read %s: %s", input_path, exc)
+        stats.record_failure()
+        return
 
-    if config.dry_run:
-        logging.info("Dry-run: would execute %s", " ".join(cmd))
+    if not reencode:
+        target_copy = config.output_dir / input_path.name
+        if config.dry_run or not config.move_originals:
+            logging.info("Skipping %s (already AV1)", input_path)
+        else:
+            move_replacing(input_path, target_copy)
+            logging.info("Already AV1, moved unchanged → %s", target_copy)
         stats.record_skipped()
         return
 
-    config.log_dir.mkdir(exist_ok=True, parents=True)
-    start = time.perf_counter()
-    with log_path.open("wb") as logfile:
-        process = subprocess.run(cmd, stdout=logfile, stderr=subprocess.STDOUT)
-    elapsed = time.perf_counter() - start
-
-    if process.returncode != 0:
+    tag = f"{input_path.stem}_{session_ts}_{index}"
+    temp_path = (config.output_dir / f"{tag}.mp4").resolve()
+    log_path = config.log_dir / f"{tag}.log"
+
+    with tempfile.TemporaryDirectory(prefix="gpt_video_compress-") as passdir:
+        if config.video_bitrate:
+            # The pass log lives in a directory of its own so parallel jobs never share one.
+            commands = build_two_pass_commands(input_path, temp_path, config, Path(passdir) / tag)
+        else:
+            commands = [build_ffmpeg_command(input_path, temp_path, config)]
+
+        if config.dry_run:
+            for cmd in commands:
+                logging.info("Dry-run: would execute %s", " ".join(cmd))
+            stats.record_skipped()
+            return
+
+        start = time.perf_counter()
+        returncode = 0
+        for cmd in commands:
+            returncode = _run_ffmpeg(cmd, log_path, config.keep_logs)
+            if returncode != 0:
+                break
+        elapsed = time.perf_counter() - start
+
+    if returncode != 0:
         logging.error(
             "FFmpeg failed for %s (exit code %s). See %s",
             input_path,
-            process.returncode,
+            returncode,
             log_path,
         )
         stats.record_failure()
@@ -258,19 +563,12 @@ def process_video(input_path: Path, config: CompressionConfig, stats: Compressio
 
     if config.move_originals:
         target_over = config.originals_dir / input_path.name
-        if target_over.exists():
-            target_over.unlink()
-        shutil.move(str(input_path), str(target_over))
+        move_replacing(input_path, target_over)
         logging.info("Moved original → %s", target_over)
 
-    if target_out.exists():
-        target_out.unlink()
-    shutil.move(str(temp_path), str(target_out))
+    move_replacing(temp_path, target_out)
     logging.info("Compressed file → %s", target_out)
 
-    if not config.keep_logs and log_path.exists():
-        log_path.unlink(missing_ok=True)
-
     stats.record_processed(orig_size_bytes, comp_size_bytes)
 
 
@@ -312,12 +610,27 @@ def parse_arguments(argv: Sequence[str]) -> tuple[argparse.Namespace, Compressio
         help="Paths to scan for videos",
     )
     parser.add_argument("--ffmpeg", default="ffmpeg", help="FFmpeg executable to use")
+    parser.add_argument("--ffprobe", default="ffprobe", help="FFprobe executable to use")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Number of encoding threads per job (default: 8, or CPUs / jobs with --jobs)",
+    )
     parser.add_argument(
-        "--threads", type=int, default=8, help="Number of encoding threads"
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of videos to encode at the same time",
     )
     parser.add_argument(
         "--crf", type=int, default=22, help="Quality target (constant rate factor)"
     )
+    parser.add_argument(
+        "--bitrate",
+        default=None,
+        help="Encode with two-pass VBR at this video bitrate (e.g. 2M) instead of CRF",
+    )
     parser.add_argument(
         "--gop", type=int, default=240, help="Maximum distance between keyframes"
     )
@@ -377,13 +690,26 @@ def parse_arguments(argv: Sequence[str]) -> tuple[argparse.Namespace, Compressio
         action="store_true",
         help="Do not move original files to the 'over' directory",
     )
+    parser.add_argument(
+        "--no-probe-cache",
+        action="store_true",
+        help=f"Always run ffprobe instead of reusing results from {DEFAULT_PROBE_CACHE}",
+    )
 
     args = parser.parse_args(argv)
 
+    jobs = max(1, args.jobs)
+    threads = args.threads
+    if threads is None:
+        # Keep the combined FFmpeg thread count close to the number of cores
+        threads = 8 if jobs == 1 else max(1, (os.cpu_count() or 1) // jobs)
+
     config = CompressionConfig(
         ffmpeg_cmd=args.ffmpeg,
-        threads=args.threads,
+        ffprobe_cmd=args.ffprobe,
+        threads=threads,
         crf=args.crf,
+        video_bitrate=args.bitrate,
         gop=args.gop,
         audio_bitrate=args.audio_bitrate,
         metadata_comment=args.metadata_comment,
@@ -396,6 +722,8 @@ def parse_arguments(argv: Sequence[str]) -> tuple[argparse.Namespace, Compressio
         skip_existing=args.skip_existing or args.dry_run,
         dry_run=args.dry_run,
         move_originals=not args.no_move_originals,
+        jobs=jobs,
+        probe_cache_path=None if args.no_probe_cache else DEFAULT_PROBE_CACHE,
     )
 
     return args, config
@@ -413,8 +741,30 @@ def main(argv: Sequence[str] | None = None) -> int:
         logging.info("No video files found with the specified criteria.")
         return 0
 
-    for video in video_files:
-        process_video(video, config, stats)
+    prepare_directories(config)
+    session_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    probe_cache = ProbeCache.load(config.probe_cache_path) if config.probe_cache_path else None
+    try:
+        if config.jobs == 1:
+            for index, (video, size) in enumerate(video_files):
+                process_video(video, size, config, stats, session_ts, index, probe_cache)
+        else:
+            with ThreadPoolExecutor(max_workers=config.jobs) as pool:
+                list(
+                    pool.map(
+                        lambda index, item: process_video(
+                            *item, config, stats, session_ts, index, probe_cache
+                        ),
+                        range(len(video_files)),
+                        video_files,
+                    )
+                )
+    finally:
+        if probe_cache:
+            try:
+                probe_cache.save()
+            except OSError as exc:
+                logging.warning("Unable to write probe cache %s: %s", probe_cache.path, exc)
 
     summarise(stats)
     logging.info("Completed at %s", datetime.now().strftime("%d/%m/%Y %H:%M:%S"))
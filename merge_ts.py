@@ -1,15 +1,61 @@
 #!/usr/bin/env python
 from __future__ import (absolute_import, division, print_function, unicode_literals)
-import os, glob, subprocess
+import os, json, subprocess
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Video extensions to include
 FILE_SUGGESTIONS = ['mpg', 'avi', 'mp4', 'flv', '3gp', 'wmv', 'vob', 'webm', 'mts', 'mkv', 'ts']
-FFMPEG = "ffmpeg -hide_banner -loglevel error"
+EXT_TUPLE = tuple(f".{ext}" for ext in FILE_SUGGESTIONS)
+FFMPEG = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error"]
+FFPROBE = ["ffprobe", "-v", "error"]
 
-def runprogram(command):
-    with open("stdout.log", "a") as fout, open("stderr.log", "a") as ferr:
-        return subprocess.call(command, shell=True, stdout=fout, stderr=ferr)
+# Sources already in these codecs can be remuxed to TS without re-encoding
+COPY_VIDEO_CODECS = {"h264"}
+COPY_AUDIO_CODECS = {"aac", "mp3"}
+
+_log_files = None
+
+def runprogram(args):
+    # argv list, no shell; the log files are opened once and shared by every call
+    global _log_files
+    if _log_files is None:
+        _log_files = (open("stdout.log", "a"), open("stderr.log", "a"))
+    fout, ferr = _log_files
+    return subprocess.run(args, stdout=fout, stderr=ferr, check=False).returncode
+
+def probe(path):
+    result = subprocess.run([*FFPROBE, "-print_format", "json", "-show_streams", path], capture_output=True, check=False)
+    try:
+        return json.loads(result.stdout or b"{}")
+    except ValueError:
+        return {}
+
+def copy_signature(filename):
+    # (video codec, audio codec) when the file can be stream-copied into TS, else None
+    streams = probe(filename).get("streams", [])
+    video = [s.get("codec_name") for s in streams if s.get("codec_type") == "video"]
+    audio = [s.get("codec_name") for s in streams if s.get("codec_type") == "audio"]
+    if not video or any(c not in COPY_VIDEO_CODECS for c in video):
+        return None
+    if any(c not in COPY_AUDIO_CODECS for c in audio):
+        return None
+    return video[0], audio[0] if audio else None
+
+def convert_to_ts(filename, index, copy=False):
+    # segments are named by position so a.mp4 and a.mkv (or an input a.ts) never share one;
+    # the leading dot keeps them out of the input scan
+    ts_file = f".seg{index:04d}_{Path(filename).stem}.ts"
+    if copy:
+        print(f"Remuxing: {filename} -> {ts_file}")
+        cmd = [*FFMPEG, "-i", filename, "-c", "copy", "-sn", "-dn", "-bsf:v", "h264_mp4toannexb", "-f", "mpegts", ts_file]
+    else:
+        print(f"Converting: {filename} -> {ts_file}")
+        # cmd = [*FFMPEG, "-i", filename, "-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-c:a", "aac", "-f", "mpegts", ts_file]
+        # -threads 2 keeps each job small so several conversions share the cores
+        cmd = [*FFMPEG, "-i", filename, "-c:v", "mpeg2video", "-threads", "2", "-q:v", "5", "-c:a", "mp2", "-b:a", "192k", ts_file]
+    runprogram(cmd)
+    return ts_file
 
 def delFile(file):
     try:
@@ -25,29 +71,30 @@ if __name__ == '__main__':
     delFile("output.mp4")
     delFile("join.txt")
 
-    ts_full_file_list = []
-
-    # Convert all supported videos to .ts
-    for filename in sorted(glob.glob("*.*")):
-        extension = Path(filename).suffix[1:].lower()
-        if extension in FILE_SUGGESTIONS:
-            base = Path(filename).stem
-            ts_file = f"{base}.ts"
-            print(f"Converting: {filename} -> {ts_file}")
-            # cmd = f'{FFMPEG} -i "{filename}" -c:v libx264 -preset veryfast -crf 23 -c:a aac -f mpegts "{ts_file}"'
-            cmd = f'{FFMPEG} -i "{filename}" -c:v mpeg2video -q:v 5 -c:a mp2 -b:a 192k "{ts_file}"'
-
-            runprogram(cmd)
-            ts_full_file_list.append(ts_file)
+    # Convert all supported videos to .ts, several at a time (order is kept for the merge)
+    with os.scandir(".") as it:
+        filenames = sorted(e.name for e in it
+                           if e.is_file() and not e.name.startswith(".") and e.name.lower().endswith(EXT_TUPLE))
+    with ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 1) // 2)) as ex:
+        # The concat below needs every segment in the same codecs, so stream copy
+        # is only used when all inputs share one copyable signature
+        signatures = set(ex.map(copy_signature, filenames))
+        signature = signatures.pop() if len(signatures) == 1 else None
+        copy = signature is not None
+        ts_full_file_list = list(ex.map(convert_to_ts, filenames, range(len(filenames)), [copy] * len(filenames)))
 
     # Create concat file
     with open("join.txt", "w") as f:
         for ts_file in ts_full_file_list:
-            f.write(f"file '{ts_file}'\n")
+            quoted = ts_file.replace("'", "'\\''")  # concat demuxer quoting
+            f.write(f"file '{quoted}'\n")
 
     # Merge into output.mp4
     print("Merging all .ts files into output.mp4")
-    merge_cmd = f'{FFMPEG} -f concat -safe 0 -i join.txt -c copy output/output.mp4'
+    merge_cmd = [*FFMPEG, "-f", "concat", "-safe", "0", "-i", "join.txt", "-c", "copy"]
+    if signature is not None and signature[1] == "aac":
+        merge_cmd += ["-bsf:a", "aac_adtstoasc"]  # ADTS (TS) -> ASC (MP4) framing
+    merge_cmd.append("output/output.mp4")
     runprogram(merge_cmd)
 
     # Optional: move originals to "over" folder
@@ -3,6 +3,7 @@ import os
 from ultralytics import YOLO
 from pathlib import Path
 import shutil
+import torch
 
 def delete_cache(paths):
     for path in paths:
@@ -32,13 +33,17 @@ def main():
     # Clean previous outputs
     delete_cache([output_image])
 
-    # Inference
+    # Inference (FP16 on the GPU when there is one)
+    cuda = torch.cuda.is_available()
     results = model.predict(
         source=str(input_path),
         save=True,
         project=str(output_dir),
         name="",  # Save image directly in `output_dir`
-        exist_ok=True
+        exist_ok=True,
+        half=cuda,
+        device=0 if cuda else "cpu",
+        verbose=False
     )
 
     # Process results
@@ -1,13 +1,41 @@
+# Outputs (under yolo_output/):
+#   pose_analysis_results.parquet  every keypoint: file, person_id, keypoint_index, x, y, confidence
+#                                  (zstd; read with pd.read_parquet)
+#   pose_scores.xlsx               one pose score per file and person
+#   top_n_pose_scores.xlsx         the --topn best-scoring people per file
+#   pose_overlay/                  images with the detected poses drawn on (video frames
+#                                  only with --video-overlay-stride)
 import os
 import sys
 from pathlib import Path
 from ultralytics import YOLO
 import argparse
 import cv2
+import numpy as np
 import pandas as pd
-import math
-from datetime import datetime
-import matplotlib.pyplot as plt
+import pyarrow as pa
+import pyarrow.parquet as pq
+import torch
+
+ANGLE_TRIPLETS = [
+    (5, 7, 9),   # left shoulder - elbow - wrist
+    (6, 8, 10),  # right shoulder - elbow - wrist
+    (11, 13, 15), # left hip - knee - ankle
+    (12, 14, 16)  # right hip - knee - ankle
+]
+TRIPLETS = np.array(ANGLE_TRIPLETS)
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+VIDEO_EXTS = (".mp4", ".avi", ".mov")
+
+POSE_SCHEMA = pa.schema([
+    ("file", pa.string()),
+    ("person_id", pa.int64()),
+    ("keypoint_index", pa.int64()),
+    ("x", pa.float64()),
+    ("y", pa.float64()),
+    ("confidence", pa.float64()),
+])
 
 def extract_pose_data(results, filename):
     pose_entries = []
@@ -15,93 +43,101 @@ def extract_pose_data(results, filename):
         keypoints = r.keypoints
         if keypoints is None:
             continue
-        for idx, kp_set in enumerate(keypoints.xy):
-            for i, (x, y) in enumerate(kp_set):
-                conf = keypoints.conf[idx][i].item()
-                pose_entries.append({
-                    "file": filename,
-                    "person_id": idx,
-                    "keypoint_index": i,
-                    "x": round(x.item(), 2),
-                    "y": round(y.item(), 2),
-                    "confidence": round(conf, 3)
-                })
+        # one device->host copy per frame instead of an .item() per coordinate
+        xy = keypoints.xy.cpu().numpy().astype(np.float64)  # [P, K, 2]
+        conf = keypoints.conf.cpu().numpy().astype(np.float64)  # [P, K]
+        n_people, n_kp = conf.shape
+        columns = zip(
+            np.repeat(np.arange(n_people), n_kp).tolist(),
+            np.tile(np.arange(n_kp), n_people).tolist(),
+            xy[..., 0].round(2).reshape(-1).tolist(),
+            xy[..., 1].round(2).reshape(-1).tolist(),
+            conf.round(3).reshape(-1).tolist(),
+        )
+        pose_entries.extend(
+            {"file": filename, "person_id": pid, "keypoint_index": i, "x": x, "y": y, "confidence": c}
+            for pid, i, x, y, c in columns
+        )
     return pose_entries
 
-def draw_pose_overlay(image_path, pose_data, output_path):
-    POSE_CONNECTIONS = [
-        (0, 1), (0, 2), (1, 3), (2, 4),
-        (5, 6), (5, 7), (7, 9), (6, 8), (8, 10),
-        (5, 11), (6, 12), (11, 12),
-        (11, 13), (13, 15), (12, 14), (14, 16)
-    ]
-
-    ANGLE_TRIPLETS = [
-        (5, 7, 9),   # left shoulder - elbow - wrist
-        (6, 8, 10),  # right shoulder - elbow - wrist
-        (11, 13, 15), # left hip - knee - ankle
-        (12, 14, 16)  # right hip - knee - ankle
-    ]
+POSE_COLUMNS = ["person_id", "keypoint_index", "x", "y", "confidence"]
+POSE_CONNECTIONS = [
+    (0, 1), (0, 2), (1, 3), (2, 4),
+    (5, 6), (5, 7), (7, 9), (6, 8), (8, 10),
+    (5, 11), (6, 12), (11, 12),
+    (11, 13), (13, 15), (12, 14), (14, 16)
+]
 
+def draw_pose_overlay(image_path, pose_data, output_path):
     img = cv2.imread(str(image_path))
     if img is None:
         return
-
-    grouped = pose_data.groupby("person_id")
-
-    for person_id, group in grouped:
-        keypoints = {int(row["keypoint_index"]): (int(row["x"]), int(row["y"]), row["confidence"])
-                     for _, row in group.iterrows() if row["confidence"] > 0.3}
-
-        for kp_idx, (x, y, conf) in keypoints.items():
+    draw_pose_overlay_on_image(img, pose_data, output_path)
+
+def draw_pose_overlay_on_image(img, pose_data, output_path):
+    # draws into img (a BGR ndarray) in place, then writes it to output_path
+    # one sort and one array copy; each person is then a plain row slice
+    arr = pose_data.sort_values("person_id", kind="stable")[POSE_COLUMNS].to_numpy(dtype=np.float64)
+    pids = arr[:, 0]
+    bounds = np.flatnonzero(pids[1:] != pids[:-1]) + 1
+    n_kp = max(17, int(arr[:, 1].max()) + 1) if len(arr) else 17
+
+    for group in np.split(arr, bounds):
+        rows = group[group[:, 4] > 0.3]
+        # one row per keypoint index: x, y, confidence (NaN when not detected)
+        kp = np.full((n_kp, 3), np.nan)
+        kp[rows[:, 1].astype(np.int32)] = np.column_stack((np.trunc(rows[:, 2:4]), rows[:, 4]))
+        valid = ~np.isnan(kp[:, 2])
+
+        for kp_idx in np.flatnonzero(valid):
+            x, y, conf = int(kp[kp_idx, 0]), int(kp[kp_idx, 1]), kp[kp_idx, 2]
             color = (0, int(conf * 255), int((1 - conf) * 255))  # green to red
             cv2.circle(img, (x, y), 5, color, -1)
             cv2.putText(img, str(kp_idx), (x + 5, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
 
         for pt1, pt2 in POSE_CONNECTIONS:
-            if pt1 in keypoints and pt2 in keypoints:
-                x1, y1, _ = keypoints[pt1]
-                x2, y2, _ = keypoints[pt2]
+            if valid[pt1] and valid[pt2]:
+                x1, y1 = int(kp[pt1, 0]), int(kp[pt1, 1])
+                x2, y2 = int(kp[pt2, 0]), int(kp[pt2, 1])
                 cv2.line(img, (x1, y1), (x2, y2), (255, 255, 0), 2)
 
-        for a, b, c in ANGLE_TRIPLETS:
-            if a in keypoints and b in keypoints and c in keypoints:
-                angle = calculate_angle(keypoints[a][:2], keypoints[b][:2], keypoints[c][:2])
-                bx, by, _ = keypoints[b]
+        angles = calculate_angles(kp[:, :2], TRIPLETS)
+        for (a, b, c), angle in zip(ANGLE_TRIPLETS, angles):
+            if valid[a] and valid[b] and valid[c]:
+                bx, by = int(kp[b, 0]), int(kp[b, 1])
                 cv2.putText(img, f"{int(angle)}°", (bx - 10, by - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 1)
 
     os.makedirs(output_path.parent, exist_ok=True)
     cv2.imwrite(str(output_path), img)
 
-def calculate_angle(a, b, c):
-    ba = (a[0] - b[0], a[1] - b[1])
-    bc = (c[0] - b[0], c[1] - b[1])
-    dot_product = ba[0]*bc[0] + ba[1]*bc[1]
-    magnitude_ba = math.sqrt(ba[0]**2 + ba[1]**2)
-    magnitude_bc = math.sqrt(bc[0]**2 + bc[1]**2)
-    if magnitude_ba * magnitude_bc == 0:
-        return 0
-    angle_rad = math.acos(max(min(dot_product / (magnitude_ba * magnitude_bc), 1.0), -1.0))
-    return math.degrees(angle_rad)
+def calculate_angles(kp, triplets):
+    # angle at the middle point of every (a, b, c) row, in degrees; 0 where a side has no length
+    ba = kp[triplets[:, 0]] - kp[triplets[:, 1]]
+    bc = kp[triplets[:, 2]] - kp[triplets[:, 1]]
+    magnitudes = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cos = np.einsum("ij,ij->i", ba, bc) / magnitudes
+    angles = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+    return np.where(magnitudes == 0, 0.0, angles)
 
 def compute_pose_score(df):
-    scores = []
-    grouped = df.groupby(["file", "person_id"])
-    for (file, pid), group in grouped:
-        valid_points = group[group["confidence"] > 0.3]
-        total_points = 17
-        score = len(valid_points) / total_points
-        avg_conf = valid_points["confidence"].mean() if not valid_points.empty else 0
-        scores.append({
-            "file": file,
-            "person_id": pid,
-            "pose_score": round(score * avg_conf, 3),
-            "avg_confidence": round(avg_conf, 3),
-            "detected_keypoints": len(valid_points)
-        })
-    return pd.DataFrame(scores)
+    keys = ["file", "person_id"]
+    total_points = 17
+    valid_points = df[df["confidence"] > 0.3]
+    scores = valid_points.groupby(keys).agg(
+        detected_keypoints=("confidence", "size"),
+        avg_confidence=("confidence", "mean"),
+    )
+    # people with no confident keypoints still get a (zero) row
+    scores = scores.reindex(df.groupby(keys).size().index, fill_value=0)
+    # Python's round(), as before: Series.round(3) scales by 1000 first and can differ in the last digit
+    scores["pose_score"] = (scores["detected_keypoints"] / total_points * scores["avg_confidence"]).map(lambda v: round(v, 3))
+    scores["avg_confidence"] = scores["avg_confidence"].map(lambda v: round(v, 3))
+    return scores.reset_index()[["file", "person_id", "pose_score", "avg_confidence", "detected_keypoints"]]
 
 def plot_pose_scores(df, output_path):
+    # matplotlib is slow to import and only needed here
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 6))
     for file, group in df.groupby("file"):
         plt.plot(group["person_id"], group["pose_score"], label=file)
@@ -120,26 +156,49 @@ def save_top_n_poses(df, n=1):
     top_n.to_excel(top_n_file, index=False)
     print(f"✅ Top-N pose scores saved to {top_n_file}")
 
-def process_source(model, source_path: Path, results_list, overlay_dir: Path):
-    if source_path.suffix.lower() in [".mp4", ".avi", ".mov"]:
-        results = model.predict(source=str(source_path), stream=True)
+def write_pose_data(writer, pose_data):
+    if pose_data:
+        writer.write_batch(pa.RecordBatch.from_pylist(pose_data, schema=POSE_SCHEMA))
+    return len(pose_data)
+
+def process_images(model, image_paths, writer, overlay_dir: Path, predict_opts=None, batch=16):
+    # one predict() over the whole list lets Ultralytics batch the images;
+    # results come back in the same order as image_paths
+    written = 0
+    results = model.predict(source=[str(p) for p in image_paths], stream=True, batch=batch, **(predict_opts or {}))
+    for image_path, r in zip(image_paths, results):
+        print(f"Processing: {image_path.name}")
+        pose_data = extract_pose_data([r], image_path.name)
+        written += write_pose_data(writer, pose_data)
+        if pose_data:
+            df = pd.DataFrame(pose_data)
+            overlay_path = overlay_dir / image_path.name
+            draw_pose_overlay(image_path, df, overlay_path)
+    return written
+
+def process_source(model, source_path: Path, writer, overlay_dir: Path, predict_opts=None, overlay_stride=0):
+    # records go straight to the parquet writer, frame by frame; returns how many were written
+    written = 0
+    if source_path.suffix.lower() in VIDEO_EXTS:
+        results = model.predict(source=str(source_path), stream=True, **(predict_opts or {}))
         for frame_id, r in enumerate(results):
             frame_pose = extract_pose_data([r], f"{source_path.name}_frame_{frame_id}")
-            results_list.extend(frame_pose)
+            written += write_pose_data(writer, frame_pose)
+            if frame_pose and overlay_stride and frame_id % overlay_stride == 0:
+                # the frame is already decoded in r.orig_img, no need to read it back from disk
+                overlay_path = overlay_dir / f"{source_path.stem}_{frame_id}.jpg"
+                draw_pose_overlay_on_image(r.orig_img, pd.DataFrame(frame_pose), overlay_path)
     else:
-        results = model.predict(source=str(source_path))
-        pose_data = extract_pose_data(results, source_path.name)
-        results_list.extend(pose_data)
-        if pose_data:
-            df = pd.DataFrame(pose_data)
-            overlay_path = overlay_dir / source_path.name
-            draw_pose_overlay(source_path, df, overlay_path)
+        written += process_images(model, [source_path], writer, overlay_dir, predict_opts)
+    return written
 
 def main():
     parser = argparse.ArgumentParser(description="YOLOv8 Pose Estimation Batch Tool")
     parser.add_argument('--folder', type=str, required=True, help="Folder with images and/or videos")
     parser.add_argument('--model', type=str, default="yolov8s-pose.pt", help="YOLOv8 pose model")
     parser.add_argument('--topn', type=int, default=1, help="Top-N poses to save per file")
+    parser.add_argument('--video-overlay-stride', type=int, default=0,
+                        help="Save a pose overlay for every Nth video frame (default 0: none)")
     args = parser.parse_args()
 
     input_dir = Path(args.folder)
@@ -148,22 +207,31 @@ def main():
         sys.exit(1)
 
     model = YOLO(args.model)
-    results_list = []
+    cuda = torch.cuda.is_available()
+    predict_opts = {"half": cuda, "device": 0 if cuda else "cpu", "verbose": False}
+    # video frames share one input shape, so cuDNN's autotuned kernels get reused
+    torch.backends.cudnn.benchmark = cuda
     overlay_dir = Path("yolo_output/pose_overlay")
     overlay_dir.mkdir(parents=True, exist_ok=True)
+    output_file = Path("yolo_output/pose_analysis_results.parquet")
+
+    files = list(input_dir.iterdir())
+    image_paths = [p for p in files if p.suffix.lower() in IMAGE_EXTS]
+    video_paths = [p for p in files if p.suffix.lower() in VIDEO_EXTS]
 
-    for file_path in input_dir.iterdir():
-        if file_path.suffix.lower() in [".jpg", ".jpeg", ".png", ".mp4", ".avi", ".mov"]:
+    total_records = 0
+    with pq.ParquetWriter(output_file, POSE_SCHEMA, compression="zstd") as writer, torch.inference_mode():
+        if image_paths:
+            total_records += process_images(model, image_paths, writer, overlay_dir, predict_opts)
+        for file_path in video_paths:
             print(f"Processing: {file_path.name}")
-            process_source(model, file_path, results_list, overlay_dir)
+            total_records += process_source(model, file_path, writer, overlay_dir, predict_opts,
+                                            args.video_overlay_stride)
 
-    if results_list:
-        df = pd.DataFrame(results_list)
-        output_file = Path("yolo_output/pose_analysis_results.xlsx")
+    if total_records:
+        df = pq.read_table(output_file).to_pandas()
         score_file = Path("yolo_output/pose_scores.xlsx")
         chart_file = Path("yolo_output/pose_score_chart.png")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        df.to_excel(output_file, index=False)
         score_df = compute_pose_score(df)
         score_df.to_excel(score_file, index=False)
         # plot_pose_scores(score_df, chart_file)